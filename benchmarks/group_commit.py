@@ -0,0 +1,108 @@
+"""Бенчмарк группового коммита платежей в сравнении с коммитом на каждый платеж.
+
+Запуск (нужна БД с примененными миграциями, платежи зачисляются на указанный счет):
+
+    python -m benchmarks.group_commit --payments 5000 --concurrency 200 --account-id 1
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from sqlalchemy import select
+
+from database.db import Session, engine
+from models.accounts import Account
+from models.users import User  # noqa: F401 (регистрация модели для связей Account)
+from routers.services.group_commit import PaymentCommitter
+from routers.services.payments import apply_payments
+from schemas import WebhookRequestSchema
+
+
+def make_payment(account_id: int, user_id: int) -> WebhookRequestSchema:
+    """Создает платеж с уникальным transaction_id (подпись на уровне сервиса не проверяется)."""
+    return WebhookRequestSchema(
+        transaction_id=str(uuid.uuid4()),
+        account_id=account_id,
+        user_id=user_id,
+        amount=1.0,
+        signature="",
+    )
+
+
+async def per_request_commit(payment: WebhookRequestSchema) -> None:
+    """Проведение платежа отдельной транзакцией с коммитом на каждый платеж."""
+    async with Session() as session:
+        await apply_payments(session, [payment])
+        await session.commit()
+
+
+async def run(
+    submit: Callable[[WebhookRequestSchema], Awaitable], payments: list[WebhookRequestSchema], concurrency: int
+) -> dict:
+    """
+    Проводит платежи с заданной параллельностью и собирает статистику.
+
+    Args:
+        submit(Callable): Функция проведения одного платежа.
+        payments(list[WebhookRequestSchema]): Платежи.
+        concurrency(int): Количество одновременных запросов.
+
+    Returns:
+        dict: Пропускная способность и задержки.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(payment: WebhookRequestSchema) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await submit(payment)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(payment) for payment in payments))
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "payments": len(payments),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(payments) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Запускает оба варианта проведения платежей и печатает результат в формате JSON."""
+    async with Session() as session:
+        user_id = await session.scalar(select(Account.user_id).where(Account.id == args.account_id))
+    if user_id is None:
+        raise SystemExit(f"Account {args.account_id} not found")
+
+    results = {}
+    payments = [make_payment(args.account_id, user_id) for _ in range(args.payments)]
+    results["per_request_commit"] = await run(per_request_commit, payments, args.concurrency)
+
+    committer = PaymentCommitter(max_batch=args.max_batch, linger=args.linger_ms / 1000)
+    committer.start()
+    payments = [make_payment(args.account_id, user_id) for _ in range(args.payments)]
+    results["group_commit"] = await run(committer.submit, payments, args.concurrency)
+    await committer.stop()
+
+    await engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=2000, help="Количество платежей в каждом прогоне")
+    parser.add_argument("--concurrency", type=int, default=100, help="Количество одновременных запросов")
+    parser.add_argument("--account-id", type=int, default=1, help="ID счета для зачисления")
+    parser.add_argument("--max-batch", type=int, default=100, help="Максимальный размер пачки")
+    parser.add_argument("--linger-ms", type=float, default=5, help="Время ожидания пополнения пачки, мс")
+    asyncio.run(main(parser.parse_args()))
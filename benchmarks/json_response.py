@@ -0,0 +1,114 @@
+"""Микробенчмарк сериализации списков: валидация response_model и json против сборки из строк и orjson.
+
+Запуск (БД не нужна, строки генерируются в памяти):
+
+    python -m benchmarks.json_response --rows 10000
+"""
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, List
+
+import orjson
+from pydantic import TypeAdapter
+
+from schemas import TransactionPageSchema, UsersWithAccounts
+
+
+# Адаптеры создаются один раз, как поля response_model в FastAPI
+transactions_adapter = TypeAdapter(TransactionPageSchema)
+users_adapter = TypeAdapter(List[UsersWithAccounts])
+
+
+def make_rows(count: int) -> tuple[list[tuple], list[tuple]]:
+    """Создает строки платежей (id, transaction_id, amount, created_at) и пользователей со счетом."""
+    now = datetime.now(timezone.utc)
+    transactions = [
+        (i, str(uuid.uuid4()), Decimal("1.50") * i, now - timedelta(minutes=i)) for i in range(count, 0, -1)
+    ]
+    users = [(i, f"user{i}@example.com", "First", "Last", i, Decimal("2.50") * i) for i in range(count, 0, -1)]
+    return transactions, users
+
+
+def response_model_transactions(rows: list[tuple]) -> bytes:
+    """Прежний путь: словари, валидация TransactionPageSchema, сериализация json (как в FastAPI)."""
+    content = {
+        "items": [{"id": i, "transaction_id": t, "amount": a, "created_at": c} for i, t, a, c in rows],
+        "next_cursor": None,
+    }
+    validated = transactions_adapter.validate_python(content, from_attributes=True)
+    return json.dumps(transactions_adapter.dump_python(validated, mode="json")).encode()
+
+
+def fast_transactions(rows: list[tuple]) -> bytes:
+    """Быстрый путь: словари из строк БД без валидации, сериализация orjson."""
+    items = [{"id": i, "transaction_id": t, "amount": str(a), "created_at": c} for i, t, a, c in rows]
+    return orjson.dumps({"items": items, "next_cursor": None})
+
+
+def response_model_users(rows: list[tuple]) -> bytes:
+    """Прежний путь: словари, валидация List[UsersWithAccounts], сериализация json (как в FastAPI)."""
+    content = [
+        {"id": i, "email": e, "full_name": f"{f} {last}", "accounts": [{"id": a, "total": t}]}
+        for i, e, f, last, a, t in rows
+    ]
+    validated = users_adapter.validate_python(content, from_attributes=True)
+    return json.dumps(users_adapter.dump_python(validated, mode="json")).encode()
+
+
+def fast_users(rows: list[tuple]) -> bytes:
+    """Быстрый путь: словари из строк БД без валидации, сериализация orjson."""
+    content = [
+        {"id": i, "email": e, "full_name": f"{f} {last}", "accounts": [{"id": a, "total": str(t)}]}
+        for i, e, f, last, a, t in rows
+    ]
+    return orjson.dumps(content)
+
+
+def measure(serialize: Callable[[list], bytes], rows: list[tuple], repeat: int) -> dict:
+    """
+    Сериализует строки несколько раз и измеряет лучшее время.
+
+    Args:
+        serialize(Callable): Функция сериализации ответа.
+        rows(list[tuple]): Строки.
+        repeat(int): Количество повторов.
+
+    Returns:
+        dict: Лучшее время сериализации ответа и размер ответа.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = serialize(rows)
+        timings.append(time.perf_counter() - start)
+    return {"best_ms": round(min(timings) * 1000, 2), "bytes": len(body)}
+
+
+def main(args: argparse.Namespace) -> None:
+    """Сравнивает способы сериализации и печатает результат в формате JSON."""
+    transactions, users = make_rows(args.rows)
+    results = {"rows": args.rows}
+    for name, slow, fast, rows in (
+        ("transactions", response_model_transactions, fast_transactions, transactions),
+        ("users_with_accounts", response_model_users, fast_users, users),
+    ):
+        before = measure(slow, rows, args.repeat)
+        after = measure(fast, rows, args.repeat)
+        results[name] = {
+            "response_model": before,
+            "fast_path": after,
+            "speedup": round(before["best_ms"] / after["best_ms"], 1),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="Количество строк в ответе")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество повторов")
+    main(parser.parse_args())
@@ -0,0 +1,299 @@
+"""Нагрузочный тест входа, платежей и списков на локальной БД PostgreSQL или SQLite.
+
+Запуск в процессе, без HTTP-сервера (БД задается через DATABASE_URL, для PostgreSQL миграции должны быть применены,
+схема SQLite создается автоматически):
+
+    DATABASE_URL=sqlite+aiosqlite:///bench.db python -m benchmarks.load --users 200 --requests 1000
+    python -m benchmarks.load --users 200 --transactions 50 --requests 2000 --concurrency 100
+
+Запуск против работающего сервера, подключенного к той же БД:
+
+    python -m benchmarks.load --base-url http://127.0.0.1:8000
+
+Тестовые данные (пользователи bench_*) создаются при первом запуске и переиспользуются в следующих,
+поэтому результаты разных версий приложения сравнимы на одинаковых данных.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+import uuid
+from contextlib import AsyncExitStack
+from typing import Awaitable, Callable
+
+import httpx
+from sqlalchemy import func, insert, select, update
+
+import config
+import main as app_main
+from database.db import Base, Session, engine
+from models.account_daily_totals import AccountDailyTotal  # noqa: F401 (регистрация таблицы для create_all)
+from models.accounts import Account
+from models.refresh_tokens import RefreshToken  # noqa: F401 (регистрация таблицы для create_all)
+from models.token_revocations import TokenRevocation  # noqa: F401 (регистрация таблицы для create_all)
+from models.transaction_keys import TransactionKey
+from models.transactions import Transaction
+from models.users import User
+from routers.services.hashing import bcrypt_context, calibrate_rounds, password_hasher
+from routers.services.statements import add_daily_totals
+from routers.services.validators import sign_webhook
+
+
+PASSWORD = "Bench12345"
+ADMIN_USERNAME = "bench_admin"
+SCENARIOS = ("login", "payment", "users_with_accounts", "transactions")
+
+
+async def seed(users: int, transactions: int) -> dict:
+    """
+    Создает тестовых пользователей со счетами и платежами, если их еще нет.
+
+    Пароли хэшируются со стоимостью, которую приложение устанавливает при запуске (HASHING_ROUNDS или подбор
+    под HASHING_TARGET_MS), чтобы вход тестовых пользователей стоил столько же, сколько вход после пересчета хэша.
+
+    Args:
+        users(int): Количество пользователей.
+        transactions(int): Количество платежей каждого пользователя.
+
+    Returns:
+        dict: Количество тестовых пользователей и платежей в БД.
+    """
+    if engine.dialect.name == "sqlite":
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+    async with Session() as session:
+        if not await session.scalar(select(User.id).where(User.username == ADMIN_USERNAME)):
+            rounds = config.HASHING_ROUNDS or await asyncio.to_thread(
+                calibrate_rounds, config.HASHING_TARGET_MS / 1000, config.HASHING_MIN_ROUNDS
+            )
+            handler = bcrypt_context.handler("bcrypt").using(rounds=rounds)
+            hashed_password = await asyncio.to_thread(handler.hash, PASSWORD)
+            await session.execute(
+                insert(User),
+                [
+                    {
+                        "email": f"{username}@example.com",
+                        "username": username,
+                        "first_name": "Bench",
+                        "last_name": "User",
+                        "password": hashed_password,
+                        "is_active": True,
+                        "is_admin": username == ADMIN_USERNAME,
+                    }
+                    for username in [ADMIN_USERNAME] + [f"bench_{i}" for i in range(users)]
+                ],
+            )
+            user_ids = (await session.scalars(select(User.id).where(User.username.like("bench%")))).all()
+            await session.execute(insert(Account), [{"user_id": user_id, "total": 0} for user_id in user_ids])
+            accounts = await session.execute(select(Account.id, Account.user_id).where(Account.user_id.in_(user_ids)))
+            for account_id, user_id in accounts.all():
+                if transactions:
+                    transaction_ids = [str(uuid.uuid4()) for _ in range(transactions)]
+                    keys = [{"transaction_id": transaction_id} for transaction_id in transaction_ids]
+                    await session.execute(insert(TransactionKey), keys)
+                    inserted = await session.execute(
+                        insert(Transaction).returning(
+                            Transaction.account_id, Transaction.created_at, Transaction.amount
+                        ),
+                        [
+                            {
+                                "transaction_id": transaction_id,
+                                "account_id": account_id,
+                                "user_id": user_id,
+                                "amount": 10.0,
+                            }
+                            for transaction_id in transaction_ids
+                        ],
+                    )
+                    # Выписки строятся из дневных итогов, поэтому они заполняются вместе с платежами
+                    await add_daily_totals(session, inserted.all())
+                    await session.execute(
+                        update(Account).where(Account.id == account_id).values(total=10.0 * transactions)
+                    )
+            await session.commit()
+        bench_users = select(User.id).where(User.username.like("bench%")).scalar_subquery()
+        return {
+            "users": await session.scalar(select(func.count()).where(User.username.like("bench%"))),
+            "transactions": await session.scalar(
+                select(func.count()).select_from(Transaction).where(Transaction.user_id.in_(bench_users))
+            ),
+        }
+
+
+async def login(client: httpx.AsyncClient, username: str) -> dict:
+    """Получает токен пользователя и возвращает заголовок авторизации."""
+    response = await client.post("/auth/token", data={"username": username, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def login_users(client: httpx.AsyncClient, usernames: list[str], concurrency: int) -> tuple[list, dict]:
+    """
+    Выполняет вход пользователей с ограниченной параллельностью.
+
+    Args:
+        client(httpx.AsyncClient): Клиент приложения.
+        usernames(list[str]): Логины пользователей.
+        concurrency(int): Количество одновременных входов.
+
+    Returns:
+        tuple[list, dict]: Заголовок авторизации каждого пользователя (None, если вход не удался)
+            и коды ответов неудачных входов.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    errors: dict[str, int] = {}
+
+    async def one(username: str) -> dict | None:
+        async with semaphore:
+            try:
+                response = await client.post("/auth/token", data={"username": username, "password": PASSWORD})
+            except httpx.HTTPError as exc:
+                code = type(exc).__name__
+            else:
+                if response.status_code == 200:
+                    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+                code = str(response.status_code)
+            errors[code] = errors.get(code, 0) + 1
+            return None
+
+    return await asyncio.gather(*(one(username) for username in usernames)), errors
+
+
+async def run(request: Callable[[int], Awaitable[httpx.Response]], requests: int, concurrency: int) -> dict:
+    """
+    Выполняет запросы с заданной параллельностью и собирает статистику.
+
+    Args:
+        request(Callable): Функция выполнения запроса по его номеру.
+        requests(int): Количество запросов.
+        concurrency(int): Количество одновременных запросов.
+
+    Returns:
+        dict: Пропускная способность, задержки и коды ответов.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses: dict[str, int] = {}
+
+    async def one(number: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                code = str((await request(number)).status_code)
+            except httpx.HTTPError as exc:
+                code = type(exc).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(number) for number in range(requests)))
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": requests,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p95_ms": round(quantiles[94] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+        "statuses": statuses,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Заполняет БД, прогоняет сценарии и печатает результат в формате JSON."""
+    # Журнал каждого запроса httpx искажает замеры
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = {"database": engine.dialect.name, "target": args.base_url or "in-process"}
+    results["seed"] = await seed(args.users, args.transactions)
+    async with AsyncExitStack() as stack:
+        if args.base_url:
+            client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+        else:
+            await stack.enter_async_context(app_main.lifespan(app_main.app))
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_main.app), base_url="http://bench")
+        await stack.enter_async_context(client)
+
+        async with Session() as session:
+            users = (
+                await session.execute(
+                    select(User.id, User.username, Account.id)
+                    .join(Account, Account.user_id == User.id)
+                    .where(User.username.like("bench\\_%", escape="\\"))
+                    .order_by(User.id)
+                    .limit(args.token_users)
+                )
+            ).all()
+        admin_headers = await login(client, ADMIN_USERNAME)
+        # Параллельные входы сверх пула хэширования ждут в очереди и завершаются по таймауту,
+        # поэтому в процессе приложения они ограничены размером пула
+        login_concurrency = args.concurrency if args.base_url else min(args.concurrency, password_hasher.max_workers)
+        headers, login_errors = await login_users(client, [username for _, username, _ in users], login_concurrency)
+        results["token_users"] = {"logged_in": len(users) - sum(login_errors.values()), "errors": login_errors}
+        # Запросы идут от имени пользователей, вход которых удался
+        logged_in = [(user, header) for user, header in zip(users, headers) if header]
+        users, headers = [user for user, _ in logged_in], [header for _, header in logged_in]
+        if not users:
+            raise SystemExit(json.dumps(results, indent=2))
+        random.seed(args.seed)
+
+        def pick(number: int) -> tuple[int, int, dict]:
+            index = random.randrange(len(users))
+            return users[index][0], users[index][2], headers[index]
+
+        async def do_login(number: int) -> httpx.Response:
+            username = users[random.randrange(len(users))][1]
+            return await client.post("/auth/token", data={"username": username, "password": PASSWORD})
+
+        async def do_payment(number: int) -> httpx.Response:
+            user_id, account_id, user_headers = pick(number)
+            transaction_id = str(uuid.uuid4())
+            payment = {
+                "transaction_id": transaction_id,
+                "account_id": account_id,
+                "user_id": user_id,
+                "amount": 1.0,
+                "signature": sign_webhook(transaction_id, user_id, account_id, 1.0),
+            }
+            return await client.post("/transaction/payment", json=payment, headers=user_headers)
+
+        async def do_users_with_accounts(number: int) -> httpx.Response:
+            return await client.get("/users/users-with-accounts", params={"limit": 100}, headers=admin_headers)
+
+        async def do_transactions(number: int) -> httpx.Response:
+            user_id, _, user_headers = pick(number)
+            return await client.get(f"/users/{user_id}/transactions", params={"limit": 100}, headers=user_headers)
+
+        scenarios = {
+            "login": (do_login, args.login_requests),
+            "payment": (do_payment, args.requests),
+            "users_with_accounts": (do_users_with_accounts, args.requests),
+            "transactions": (do_transactions, args.requests),
+        }
+        results["scenarios"] = {}
+        for name in args.scenarios:
+            request, requests = scenarios[name]
+            results["scenarios"][name] = await run(request, requests, args.concurrency)
+
+    await engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="Адрес работающего сервера, по умолчанию приложение запускается в процессе")
+    parser.add_argument("--users", type=int, default=100, help="Количество тестовых пользователей")
+    parser.add_argument("--transactions", type=int, default=20, help="Количество платежей каждого пользователя")
+    parser.add_argument(
+        "--token-users", type=int, default=20, help="Количество пользователей, от имени которых идут запросы"
+    )
+    parser.add_argument("--requests", type=int, default=1000, help="Количество запросов в сценарии")
+    parser.add_argument("--login-requests", type=int, default=100, help="Количество запросов в сценарии входа")
+    parser.add_argument("--concurrency", type=int, default=50, help="Количество одновременных запросов")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS), help="Сценарии")
+    parser.add_argument("--seed", type=int, default=0, help="Начальное значение генератора случайных чисел")
+    asyncio.run(main(parser.parse_args()))
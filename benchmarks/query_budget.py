@@ -0,0 +1,283 @@
+"""Проверка количества запросов к БД на каждый эндпоинт и поиск повторяющихся запросов (N+1).
+
+Каждый эндпоинт routers/users.py, routers/auth.py и routers/transactions.py вызывается в процессе приложения
+с холодным кэшем, запросы к БД записываются через QueryLog. Скрипт завершается с кодом 1, если эндпоинт
+превысил бюджет запросов, выполнил одинаковый запрос несколько раз или не покрыт проверкой.
+Те же проверки выполняются тестами tests/test_query_budget.py.
+
+Запуск на PostgreSQL с примененными миграциями (БД задается переменными DB_* или DATABASE_URL,
+количество запросов зависит от диалекта, а пачка платежей проводится запросом, который SQLite не поддерживает):
+
+    python -m benchmarks.query_budget
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy import select
+
+import main as app_main
+from benchmarks.load import ADMIN_USERNAME, PASSWORD, login, seed
+from database.db import Session, engine
+from models.accounts import Account
+from models.users import User
+from routers import auth, transactions, users
+from routers.services.cache import accounts_key, cache
+from routers.services.metrics import QueryLog
+from routers.services.validators import sign_webhook
+
+
+# Максимальное количество запросов к БД на эндпоинт (метод, шаблон пути)
+BUDGETS = {
+    ("POST", "/auth/token"): 2,
+    ("POST", "/auth/refresh"): 3,
+    ("GET", "/auth/.well-known/jwks.json"): 0,
+    ("POST", "/transaction/payment"): 4,
+    ("POST", "/transaction/payments/batch"): 6,
+    ("POST", "/users/"): 3,
+    ("GET", "/users/users-with-accounts"): 2,
+    ("PUT", "/users/{user_id}"): 2,
+    ("GET", "/users/{user_id}"): 1,
+    ("DELETE", "/users/{user_id}"): 4,
+    ("GET", "/users/{user_id}/accounts"): 1,
+    ("GET", "/users/{user_id}/accounts/{account_id}/statement"): 1,
+    ("GET", "/users/{user_id}/transactions"): 1,
+    ("GET", "/users/{user_id}/transactions/export"): 2,
+}
+
+
+@dataclass
+class BudgetContext:
+    """Клиент приложения и данные тестового пользователя для проверки эндпоинтов."""
+
+    client: httpx.AsyncClient
+    headers: dict
+    admin_headers: dict
+    user_id: int
+    account_id: int
+    batch: int
+
+
+# Запрос эндпоинта: путь и параметры httpx. Подготовка (создание пользователя, вход) выполняется
+# до вызова эндпоинта и в бюджет не входит
+RequestBuilder = Callable[[BudgetContext], Awaitable[tuple[str, dict]]]
+
+
+def payment(user_id: int, account_id: int) -> dict:
+    """Создает подписанный платеж."""
+    transaction_id = str(uuid.uuid4())
+    return {
+        "transaction_id": transaction_id,
+        "account_id": account_id,
+        "user_id": user_id,
+        "amount": 1.0,
+        "signature": sign_webhook(transaction_id, user_id, account_id, 1.0),
+    }
+
+
+def new_user() -> dict:
+    """Данные нового пользователя."""
+    username = f"bench_tmp_{uuid.uuid4().hex[:8]}"
+    return {
+        "email": f"{username}@example.com",
+        "username": username,
+        "first_name": "Bench",
+        "last_name": "User",
+        "password": PASSWORD,
+    }
+
+
+async def create_user(context: BudgetContext) -> tuple[int, dict]:
+    """Создает пользователя и возвращает его ID и данные."""
+    user_data = new_user()
+    response = await context.client.post("/users/", json=user_data, headers=context.admin_headers)
+    response.raise_for_status()
+    async with Session() as session:
+        user_id = await session.scalar(select(User.id).where(User.username == user_data["username"]))
+    return user_id, user_data
+
+
+async def _token(context: BudgetContext) -> tuple[str, dict]:
+    return "/auth/token", {"data": {"username": "bench_0", "password": PASSWORD}}
+
+
+async def _refresh(context: BudgetContext) -> tuple[str, dict]:
+    response = await context.client.post("/auth/token", data={"username": "bench_0", "password": PASSWORD})
+    response.raise_for_status()
+    return "/auth/refresh", {"json": {"refresh_token": response.json()["refresh_token"]}}
+
+
+async def _jwks(context: BudgetContext) -> tuple[str, dict]:
+    return "/auth/.well-known/jwks.json", {}
+
+
+async def _payment(context: BudgetContext) -> tuple[str, dict]:
+    return "/transaction/payment", {"json": payment(context.user_id, context.account_id), "headers": context.headers}
+
+
+async def _payments_batch(context: BudgetContext) -> tuple[str, dict]:
+    batch = [payment(context.user_id, context.account_id) for _ in range(context.batch)]
+    return "/transaction/payments/batch", {"json": batch, "headers": context.headers}
+
+
+async def _create_user(context: BudgetContext) -> tuple[str, dict]:
+    return "/users/", {"json": new_user(), "headers": context.admin_headers}
+
+
+async def _users_with_accounts(context: BudgetContext) -> tuple[str, dict]:
+    return "/users/users-with-accounts", {"params": {"limit": 100}, "headers": context.admin_headers}
+
+
+async def _update_user(context: BudgetContext) -> tuple[str, dict]:
+    user_id, user_data = await create_user(context)
+    update_data = {**user_data, "password": None, "first_name": "Changed"}
+    return f"/users/{user_id}", {"json": update_data, "headers": context.admin_headers}
+
+
+async def _retrieve_user(context: BudgetContext) -> tuple[str, dict]:
+    user_id, _ = await create_user(context)
+    return f"/users/{user_id}", {"headers": context.admin_headers}
+
+
+async def _delete_user(context: BudgetContext) -> tuple[str, dict]:
+    user_id, _ = await create_user(context)
+    return f"/users/{user_id}", {"headers": context.admin_headers}
+
+
+async def _accounts(context: BudgetContext) -> tuple[str, dict]:
+    await cache.invalidate(accounts_key(context.user_id))
+    return f"/users/{context.user_id}/accounts", {"headers": context.headers}
+
+
+async def _statement(context: BudgetContext) -> tuple[str, dict]:
+    path = f"/users/{context.user_id}/accounts/{context.account_id}/statement"
+    return path, {"params": {"granularity": "week"}, "headers": context.headers}
+
+
+async def _transactions(context: BudgetContext) -> tuple[str, dict]:
+    return f"/users/{context.user_id}/transactions", {"headers": context.headers}
+
+
+async def _export(context: BudgetContext) -> tuple[str, dict]:
+    return f"/users/{context.user_id}/transactions/export", {"headers": context.headers}
+
+
+REQUESTS: dict[tuple[str, str], RequestBuilder] = {
+    ("POST", "/auth/token"): _token,
+    ("POST", "/auth/refresh"): _refresh,
+    ("GET", "/auth/.well-known/jwks.json"): _jwks,
+    ("POST", "/transaction/payment"): _payment,
+    ("POST", "/transaction/payments/batch"): _payments_batch,
+    ("POST", "/users/"): _create_user,
+    ("GET", "/users/users-with-accounts"): _users_with_accounts,
+    ("PUT", "/users/{user_id}"): _update_user,
+    ("GET", "/users/{user_id}"): _retrieve_user,
+    ("DELETE", "/users/{user_id}"): _delete_user,
+    ("GET", "/users/{user_id}/accounts"): _accounts,
+    ("GET", "/users/{user_id}/accounts/{account_id}/statement"): _statement,
+    ("GET", "/users/{user_id}/transactions"): _transactions,
+    ("GET", "/users/{user_id}/transactions/export"): _export,
+}
+
+
+async def prepare(client: httpx.AsyncClient, batch: int) -> BudgetContext:
+    """
+    Выполняет вход тестового пользователя и администратора, созданных seed.
+
+    Args:
+        client(httpx.AsyncClient): Клиент приложения.
+        batch(int): Количество платежей в пачке.
+
+    Returns:
+        BudgetContext: Данные для проверки эндпоинтов.
+    """
+    async with Session() as session:
+        user_id, account_id = (
+            await session.execute(
+                select(User.id, Account.id).join(Account, Account.user_id == User.id).where(User.username == "bench_0")
+            )
+        ).one()
+    return BudgetContext(
+        client=client,
+        headers=await login(client, "bench_0"),
+        admin_headers=await login(client, ADMIN_USERNAME),
+        user_id=user_id,
+        account_id=account_id,
+        batch=batch,
+    )
+
+
+def uncovered_routes(covered: set[tuple[str, str]]) -> list[str]:
+    """Эндпоинты routers/auth.py, routers/transactions.py и routers/users.py без бюджета запросов."""
+    routes = {
+        (method, route.path)
+        for router in (auth.router, transactions.router, users.router)
+        for route in router.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    return sorted(f"{method} {route}" for method, route in routes - covered)
+
+
+async def check(context: BudgetContext, method: str, route: str) -> dict:
+    """
+    Выполняет запрос к эндпоинту и сравнивает запросы к БД с бюджетом.
+
+    Args:
+        context(BudgetContext): Данные для проверки эндпоинтов.
+        method(str): HTTP-метод.
+        route(str): Шаблон пути эндпоинта.
+
+    Returns:
+        dict: Код ответа, количество запросов, бюджет, повторяющиеся запросы и ошибки проверки.
+    """
+    path, kwargs = await REQUESTS[(method, route)](context)
+    with QueryLog() as log:
+        response = await context.client.request(method, path, **kwargs)
+    budget = BUDGETS[(method, route)]
+    repeated = log.repeated()
+    errors = []
+    if response.status_code >= 400:
+        errors.append(f"unexpected status {response.status_code}: {response.text[:200]}")
+    if log.count > budget:
+        errors.append(f"{log.count} queries, budget {budget}")
+    if repeated:
+        errors.append("repeated statements (N+1)")
+    return {
+        "status": response.status_code,
+        "queries": log.count,
+        "budget": budget,
+        "repeated": repeated,
+        "errors": errors,
+    }
+
+
+async def main(args: argparse.Namespace) -> int:
+    """Проверяет эндпоинты, печатает результат в формате JSON и возвращает код завершения."""
+    await seed(args.users, args.transactions)
+    results = {}
+    async with app_main.lifespan(app_main.app):
+        transport = httpx.ASGITransport(app=app_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            context = await prepare(client, args.batch)
+            for method, route in BUDGETS:
+                results[f"{method} {route}"] = await check(context, method, route)
+    await engine.dispose()
+    uncovered = uncovered_routes(set(BUDGETS))
+    print(json.dumps({"routes": results, "uncovered": uncovered}, indent=2))
+    return int(bool(uncovered) or any(result["errors"] for result in results.values()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="Количество тестовых пользователей")
+    parser.add_argument("--transactions", type=int, default=20, help="Количество платежей каждого пользователя")
+    parser.add_argument("--batch", type=int, default=10, help="Количество платежей в пачке")
+    sys.exit(asyncio.run(main(parser.parse_args())))
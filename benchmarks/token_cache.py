@@ -0,0 +1,61 @@
+"""Микробенчмарк проверки токена в get_current_user с кэшем проверенных токенов и без него.
+
+Запуск (БД не нужна, используются SECRET_KEY и ALGORITHM из окружения):
+
+    python -m benchmarks.token_cache --requests 100000 --tokens 1000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import timedelta
+from typing import Callable
+
+from routers.auth import create_access_token, decode_token, get_current_user
+from routers.services.token_cache import token_cache
+
+
+async def measure(check: Callable, tokens: list[str], requests: int) -> dict:
+    """
+    Проверяет токены по кругу и измеряет среднее время одной проверки.
+
+    Args:
+        check(Callable): Функция проверки токена.
+        tokens(list[str]): Токены.
+        requests(int): Количество проверок.
+
+    Returns:
+        dict: Общее время и время одной проверки.
+    """
+    start = time.perf_counter()
+    for i in range(requests):
+        result = check(tokens[i % len(tokens)])
+        if asyncio.iscoroutine(result):
+            await result
+    elapsed = time.perf_counter() - start
+    return {"requests": requests, "seconds": round(elapsed, 3), "per_request_us": round(elapsed / requests * 1e6, 2)}
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Сравнивает полную проверку токена и проверку через кэш и печатает результат в формате JSON."""
+    tokens = [
+        await create_access_token(user_id, f"user{user_id}", False, expires_delta=timedelta(minutes=100))
+        for user_id in range(args.tokens)
+    ]
+    results = {"full_decode": await measure(decode_token, tokens, args.requests)}
+    token_cache.clear()
+    for token in tokens:
+        await get_current_user(token)
+    results["cached"] = await measure(get_current_user, tokens, args.requests)
+    results["saved_per_request_us"] = round(
+        results["full_decode"]["per_request_us"] - results["cached"]["per_request_us"], 2
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100000, help="Количество проверок в каждом прогоне")
+    parser.add_argument("--tokens", type=int, default=1000, help="Количество различных токенов")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,81 @@
+"""Микробенчмарк проверки подписи вебхука: старый SHA-256 с секретом и HMAC-SHA256.
+
+Запуск (БД не нужна, используется WEBHOOK_SECRET или SECRET_KEY из окружения):
+
+    python -m benchmarks.webhook_signature --webhooks 100000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from typing import Callable
+
+import config
+from routers.services.validators import _verify_legacy, canonical_payload, sign_webhook, verify_signatures
+from schemas import WebhookRequestSchema
+
+
+def make_webhooks(count: int, legacy: bool) -> list[WebhookRequestSchema]:
+    """Создает вебхуки с подписью старого формата или HMAC."""
+    webhooks = []
+    for i in range(count):
+        transaction_id, amount = str(uuid.uuid4()), float(i)
+        if legacy:
+            payload = f"1{amount}{transaction_id}2{config.SECRET_KEY}"
+            signature = hashlib.sha256(payload.encode()).hexdigest()
+        else:
+            signature = sign_webhook(transaction_id, 2, 1, amount)
+        webhooks.append(
+            WebhookRequestSchema(
+                transaction_id=transaction_id, account_id=1, user_id=2, amount=amount, signature=signature
+            )
+        )
+    return webhooks
+
+
+def hmac_without_precompute(data: WebhookRequestSchema) -> bool:
+    """Проверка HMAC с вычислением состояния ключа на каждый вебхук (для сравнения)."""
+    message = canonical_payload(data.transaction_id, data.user_id, data.account_id, data.amount)
+    expected = "v1=" + hmac.new(config.WEBHOOK_SECRET.encode(), message, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected.encode(), data.signature.encode())
+
+
+def measure(check: Callable[[list], list], webhooks: list[WebhookRequestSchema]) -> dict:
+    """
+    Проверяет подписи вебхуков и измеряет время проверки одного вебхука.
+
+    Args:
+        check(Callable): Функция проверки списка вебхуков.
+        webhooks(list[WebhookRequestSchema]): Вебхуки.
+
+    Returns:
+        dict: Общее время и время проверки одного вебхука.
+    """
+    start = time.perf_counter()
+    results = check(webhooks)
+    elapsed = time.perf_counter() - start
+    assert all(results), "benchmark webhooks must have valid signatures"
+    return {"seconds": round(elapsed, 3), "per_webhook_us": round(elapsed / len(webhooks) * 1e6, 2)}
+
+
+def main(args: argparse.Namespace) -> None:
+    """Сравнивает способы проверки подписи и печатает результат в формате JSON."""
+    legacy = make_webhooks(args.webhooks, legacy=True)
+    signed = make_webhooks(args.webhooks, legacy=False)
+    results = {
+        "webhooks": args.webhooks,
+        "legacy_sha256": measure(lambda items: [_verify_legacy(data) for data in items], legacy),
+        "hmac_per_message_key": measure(lambda items: [hmac_without_precompute(data) for data in items], signed),
+        "hmac_precomputed_batch": measure(lambda items: asyncio.run(verify_signatures(items)), signed),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--webhooks", type=int, default=100000, help="Количество вебхуков")
+    main(parser.parse_args())
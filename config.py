@@ -13,9 +13,63 @@ DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DATABASE_URL = os.getenv("DATABASE_URL") or (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+DB_REPLICA_URL = os.getenv("DB_REPLICA_URL")
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 500))
 
 MODE = os.getenv("MODE")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 500))
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
+
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or SECRET_KEY
+WEBHOOK_SECRET_PREVIOUS = os.getenv("WEBHOOK_SECRET_PREVIOUS")
+WEBHOOK_LEGACY_SIGNATURES = os.getenv("WEBHOOK_LEGACY_SIGNATURES", "false").lower() == "true"
+
+HASHING_EXECUTOR = os.getenv("HASHING_EXECUTOR", "thread")
+HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", min(4, os.cpu_count() or 1)))
+HASHING_MAX_QUEUE = int(os.getenv("HASHING_MAX_QUEUE", 64))
+HASHING_TIMEOUT = float(os.getenv("HASHING_TIMEOUT", 5))
+HASHING_ROUNDS = int(os.getenv("HASHING_ROUNDS")) if os.getenv("HASHING_ROUNDS") else None
+HASHING_TARGET_MS = float(os.getenv("HASHING_TARGET_MS", 250))
+HASHING_MIN_ROUNDS = int(os.getenv("HASHING_MIN_ROUNDS", 12))
+
+PAYMENT_BATCH_MAX_SIZE = int(os.getenv("PAYMENT_BATCH_MAX_SIZE", 1000))
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+PARTITION_KEEP_MONTHS = int(os.getenv("PARTITION_KEEP_MONTHS", 24))
+
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "false").lower() == "true"
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", 100))
+GROUP_COMMIT_LINGER_MS = float(os.getenv("GROUP_COMMIT_LINGER_MS", 5))
+
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 100000))
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_TTL = float(os.getenv("CACHE_TTL", 60))
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", 10000))
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
+JWT_ACCEPT_SECRET_TOKENS = os.getenv("JWT_ACCEPT_SECRET_TOKENS", "false").lower() == "true"
+JWKS_MAX_AGE = int(os.getenv("JWKS_MAX_AGE", 300))
+
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
+TOKEN_REVOCATION_POLL_SECONDS = float(os.getenv("TOKEN_REVOCATION_POLL_SECONDS", 1))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
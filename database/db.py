@@ -1,13 +1,41 @@
 """Модуль с базой данных."""
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
-from config import DATABASE_URL
+import config
+from database.pool import MonitoredQueuePool
 
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+def create_engine(url: str) -> AsyncEngine:
+    """
+    Создает асинхронный движок с настройками пула соединений из конфигурации.
+
+    Args:
+        url(str): Адрес БД.
+
+    Returns:
+        AsyncEngine: Движок БД.
+    """
+    # Кэш подготовленных выражений настраивается только для asyncpg (SQLite используется в бенчмарках)
+    connect_args = {"prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE} if "+asyncpg" in url else {}
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=MonitoredQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+engine = create_engine(config.DATABASE_URL)
+replica_engine = create_engine(config.DB_REPLICA_URL) if config.DB_REPLICA_URL else engine
 Session = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+ReadSession = async_sessionmaker(bind=replica_engine, expire_on_commit=False, class_=AsyncSession)
 
 
 class Base(DeclarativeBase):
@@ -1,11 +1,64 @@
 """Модуль с помощью которого создаются асинхронные сессии для работы с БД."""
 
+import time
 from typing import AsyncGenerator
 
-from database.db import Session
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+import config
+from database.db import ReadSession, Session
+
+
+READ_CONSISTENCY_HEADER = "X-Read-Consistency"
+
+_recent_writes: dict[int, float] = {}
 
 
 async def get_db() -> AsyncGenerator[AsyncGenerator, None]:
     """Создает асинхронную сессию для работы с БД."""
     async with Session() as session:
         yield session
+
+
+def mark_user_write(user_id: int) -> None:
+    """
+    Отмечает изменение данных пользователя.
+
+    В течение DB_REPLICA_STICKY_SECONDS чтения данных этого пользователя выполняются в основной БД,
+    чтобы не получить с реплики данные до изменения.
+
+    Args:
+        user_id(int): Идентификатор пользователя.
+    """
+    now = time.monotonic()
+    for expired_user_id in [key for key, until in _recent_writes.items() if until <= now]:
+        del _recent_writes[expired_user_id]
+    _recent_writes[user_id] = now + config.DB_REPLICA_STICKY_SECONDS
+
+
+def get_read_session_factory(request: Request) -> async_sessionmaker:
+    """
+    Выбирает фабрику сессий для чтения: реплику или основную БД.
+
+    Основная БД используется, если клиент передал заголовок X-Read-Consistency: strong
+    или данные пользователя из пути запроса недавно изменялись.
+
+    Args:
+        request(Request): Запрос.
+
+    Returns:
+        async_sessionmaker: Фабрика сессий.
+    """
+    if request.headers.get(READ_CONSISTENCY_HEADER, "").lower() == "strong":
+        return Session
+    user_id = str(request.path_params.get("user_id", ""))
+    if user_id.isdigit() and _recent_writes.get(int(user_id), 0) > time.monotonic():
+        return Session
+    return ReadSession
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Создает асинхронную сессию для чтения из реплики БД, если она настроена."""
+    async with get_read_session_factory(request)() as session:
+        yield session
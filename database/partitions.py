@@ -0,0 +1,197 @@
+"""Модуль с обслуживанием месячных секций таблицы transactions (PostgreSQL).
+
+Секции создаются заранее на PARTITION_MONTHS_AHEAD месяцев вперед, секции старше PARTITION_KEEP_MONTHS месяцев
+отсоединяются без блокировки записи и переносятся в схему archive (или удаляются). Ключи transaction_keys
+архивных платежей сохраняются, поэтому их повтор по-прежнему отклоняется.
+
+    python -m database.partitions create
+    python -m database.partitions archive [--drop]
+"""
+
+import argparse
+import asyncio
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+import config
+from database.db import engine
+
+
+TABLE = "transactions"
+ARCHIVE_SCHEMA = "archive"
+# Верхняя граница секции в выражении FOR VALUES FROM (...) TO ('...')
+UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(day: date) -> date:
+    """Первое число месяца."""
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Первое число месяца, отстоящего от month на months месяцев."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Имя секции месяца."""
+    return f"{TABLE}_y{month.year}m{month.month:02d}"
+
+
+def bound(month: date) -> str:
+    """Граница секции - начало месяца по UTC."""
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+async def list_partitions(connection: AsyncConnection) -> dict[str, date]:
+    """
+    Возвращает секции таблицы transactions.
+
+    Args:
+        connection(AsyncConnection): Соединение с БД.
+
+    Returns:
+        dict[str, date]: Верхняя граница (первое число следующего месяца) для каждой секции.
+    """
+    rows = await connection.execute(
+        text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table AND parent.relnamespace = 'public'::regnamespace"
+        ),
+        {"table": TABLE},
+    )
+    partitions = {}
+    for name, expression in rows:
+        match = UPPER_BOUND.search(expression)
+        if match:
+            partitions[name] = datetime.fromisoformat(match.group(1)).astimezone(timezone.utc).date()
+    return partitions
+
+
+async def missing_partitions(connection: AsyncConnection, months_ahead: int, today: date) -> list[str]:
+    """
+    Возвращает имена отсутствующих секций текущего месяца и months_ahead месяцев после него.
+
+    Платеж, для даты которого нет секции, не вставляется, поэтому отсутствие секций проверяется
+    при запуске приложения и служебным эндпоинтом. Все секции (включая первую, созданную из исходной
+    таблицы) заканчиваются первым числом месяца, поэтому месяц покрыт, если есть секция с границей
+    первого числа следующего месяца.
+
+    Args:
+        connection(AsyncConnection): Соединение с БД.
+        months_ahead(int): Количество месяцев после текущего.
+        today(date): Текущая дата.
+
+    Returns:
+        list[str]: Имена отсутствующих секций.
+    """
+    upper_bounds = set((await list_partitions(connection)).values())
+    months = [add_months(month_start(today), months) for months in range(months_ahead + 1)]
+    return [partition_name(month) for month in months if add_months(month, 1) not in upper_bounds]
+
+
+async def check_partitions(months_ahead: int) -> list[str]:
+    """
+    Проверяет секции текущего месяца и months_ahead месяцев после него в основной БД.
+
+    Args:
+        months_ahead(int): Количество месяцев после текущего.
+
+    Returns:
+        list[str]: Имена отсутствующих секций (пустой список для БД без секций, например SQLite).
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+    async with engine.connect() as connection:
+        return await missing_partitions(connection, months_ahead, datetime.now(timezone.utc).date())
+
+
+async def create_partitions(connection: AsyncConnection, months_ahead: int, today: date) -> list[str]:
+    """
+    Создает секции на months_ahead месяцев после текущего.
+
+    Секция создается отдельной таблицей и присоединяется командой ATTACH PARTITION, которая не блокирует
+    запись в transactions (CREATE TABLE ... PARTITION OF блокирует ее до конца транзакции).
+
+    Args:
+        connection(AsyncConnection): Соединение с БД в режиме AUTOCOMMIT.
+        months_ahead(int): Количество месяцев после текущего.
+        today(date): Текущая дата.
+
+    Returns:
+        list[str]: Имена созданных секций.
+    """
+    partitions = await list_partitions(connection)
+    last = add_months(month_start(today), months_ahead + 1)
+    month = max(partitions.values(), default=month_start(today))
+    created = []
+    while month < last:
+        name, end = partition_name(month), add_months(month, 1)
+        await connection.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)"))
+        await connection.execute(
+            text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({bound(month)}) TO ({bound(end)})")
+        )
+        created.append(name)
+        month = end
+    return created
+
+
+async def archive_partitions(connection: AsyncConnection, keep_months: int, today: date, drop: bool) -> list[str]:
+    """
+    Отсоединяет секции, все строки которых старше keep_months месяцев.
+
+    Args:
+        connection(AsyncConnection): Соединение с БД в режиме AUTOCOMMIT (DETACH CONCURRENTLY
+            не выполняется внутри транзакции).
+        keep_months(int): Количество хранимых месяцев, включая текущий.
+        today(date): Текущая дата.
+        drop(bool): Удалить секции вместо переноса в схему archive.
+
+    Returns:
+        list[str]: Имена отсоединенных секций.
+    """
+    oldest = add_months(month_start(today), 1 - keep_months)
+    partitions = await list_partitions(connection)
+    archived = []
+    for name, end in sorted(partitions.items(), key=lambda item: item[1]):
+        if end > oldest:
+            break
+        await connection.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name} CONCURRENTLY"))
+        if drop:
+            await connection.execute(text(f"DROP TABLE {name}"))
+        else:
+            await connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            await connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        archived.append(name)
+    return archived
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Выполняет команду обслуживания секций и печатает имена измененных секций."""
+    today = datetime.now(timezone.utc).date()
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        if args.command == "create":
+            names = await create_partitions(connection, args.months_ahead, today)
+        else:
+            names = await archive_partitions(connection, args.keep_months, today, args.drop)
+    await engine.dispose()
+    for name in names:
+        print(name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="Создать секции на будущие месяцы")
+    create.add_argument("--months-ahead", type=int, default=config.PARTITION_MONTHS_AHEAD)
+    archive = commands.add_parser("archive", help="Отсоединить старые секции")
+    archive.add_argument("--keep-months", type=int, default=config.PARTITION_KEEP_MONTHS)
+    archive.add_argument("--drop", action="store_true", help="Удалить секции вместо переноса в схему archive")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,64 @@
+"""Модуль с пулом соединений, собирающим статистику ожидания соединений."""
+
+import time
+from typing import Callable
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, который считает время получения соединения и таймауты ожидания."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Инициализация пула и счетчиков."""
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        # Обработчик времени ожидания каждого соединения (сбор метрик)
+        self.on_wait: Callable[[float], None] | None = None
+
+    def connect(self) -> PoolProxiedConnection:
+        """Выдает соединение из пула, замеряя время ожидания."""
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            if self.on_wait is not None:
+                self.on_wait(waited)
+        self.checkouts += 1
+        return connection
+
+    def recreate(self) -> "MonitoredQueuePool":
+        """Создает новый пул с теми же настройками и обработчиком времени ожидания."""
+        pool = super().recreate()
+        pool.on_wait = self.on_wait
+        return pool
+
+    def stats(self) -> dict:
+        """
+        Статистика пула.
+
+        Returns:
+            dict: Размер пула, выданные соединения, переполнение, время ожидания и таймауты.
+        """
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": self.wait_seconds,
+            "wait_seconds_avg": self.wait_seconds / self.checkouts if self.checkouts else 0.0,
+            "wait_seconds_max": self.max_wait_seconds,
+        }
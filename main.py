@@ -1,8 +1,54 @@
 """Модуль выполняет инициализацию FastAPI."""
 
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+
+import config
+from database.db import Session, engine, replica_engine
+from database.partitions import check_partitions
+from routers import auth, internal, metrics, transactions, users
+from routers.services.group_commit import payment_committer
+from routers.services.hashing import password_hasher
+from routers.services.idempotency import recent_transactions
+from routers.services.metrics import MetricsMiddleware, instrument_engine
+from routers.services.revocation import revoked_tokens
+
+
+logging.basicConfig(level=config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
 
-from routers import auth, transactions, users
+instrument_engine("primary", engine)
+if replica_engine is not engine:
+    instrument_engine("replica", replica_engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Запуск и остановка фоновых ресурсов приложения."""
+    await password_hasher.configure(
+        config.HASHING_ROUNDS, target=config.HASHING_TARGET_MS / 1000, min_rounds=config.HASHING_MIN_ROUNDS
+    )
+    async with Session() as session:
+        await recent_transactions.warm(session)
+        await revoked_tokens.refresh(session)
+    missing_partitions = await check_partitions(config.PARTITION_MONTHS_AHEAD)
+    if missing_partitions:
+        # Платежи за месяц без секции отклоняются с ошибкой сервера
+        logger.warning(
+            "Missing transactions partitions %s, run python -m database.partitions create",
+            ", ".join(missing_partitions),
+        )
+    revoked_tokens.start()
+    if config.GROUP_COMMIT_ENABLED:
+        payment_committer.start()
+    yield
+    await revoked_tokens.stop()
+    await payment_committer.stop()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -10,8 +56,15 @@ app = FastAPI(
     summary="Приложение для авторизации и просмотр счетов и платежей",
     version="0.0.1",
     redoc_url=None,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(transactions.router)
+app.include_router(internal.router)
+
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
@@ -10,7 +10,11 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from config import DATABASE_URL
 from database.db import Base
+from models.account_daily_totals import AccountDailyTotal
 from models.accounts import Account
+from models.refresh_tokens import RefreshToken
+from models.token_revocations import TokenRevocation
+from models.transaction_keys import TransactionKey
 from models.transactions import Transaction
 from models.users import User
 
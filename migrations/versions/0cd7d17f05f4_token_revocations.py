@@ -0,0 +1,41 @@
+"""token_revocations
+
+Revision ID: 0cd7d17f05f4
+Revises: e183ab955d96
+Create Date: 2026-10-17 11:02:37.540913
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0cd7d17f05f4'
+down_revision: Union[str, None] = 'e183ab955d96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Значение по умолчанию у NOT NULL колонки не требует перезаписи таблицы
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('token_revocations',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('token_version', sa.Integer(), nullable=False),
+                    sa.Column('revoked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_token_revocations_revoked_at'), 'token_revocations', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_token_revocations_revoked_at'), table_name='token_revocations')
+    op.drop_table('token_revocations')
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,76 @@
+"""account_daily_totals
+
+Итоги платежей, проведенных до миграции 75edaecb9f02, относятся к дню этой миграции: их created_at равен
+времени миграции, поэтому выписки за более ранние периоды их не содержат.
+
+Revision ID: 6484febf9b96
+Revises: 75edaecb9f02
+Create Date: 2026-10-17 18:20:41.736215
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6484febf9b96'
+down_revision: Union[str, None] = '75edaecb9f02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+LOCK_TIMEOUT = '5s'
+# Добавляет платежи к дневным итогам; платеж попадает в итоги дня created_at по UTC
+UPSERT = (
+    'INSERT INTO account_daily_totals (account_id, day, credits, total) '
+    'SELECT account_id, (created_at AT TIME ZONE \'UTC\')::date, count(*), sum(amount) FROM transactions '
+    'WHERE account_id IS NOT NULL AND {condition} GROUP BY 1, 2 '
+    'ON CONFLICT (account_id, day) DO UPDATE SET credits = account_daily_totals.credits + excluded.credits, '
+    'total = account_daily_totals.total + excluded.total'
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('account_daily_totals',
+                    sa.Column('account_id', sa.Integer(), nullable=False),
+                    sa.Column('day', sa.Date(), nullable=False),
+                    sa.Column('credits', sa.Integer(), nullable=False),
+                    sa.Column('total', sa.Numeric(precision=18, scale=2), nullable=False),
+                    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+                    sa.PrimaryKeyConstraint('account_id', 'day')
+                    )
+    # Платежи, проведенные во время миграции, добавляются к итогам триггером, существующие - пачками
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute(
+        'CREATE FUNCTION account_daily_totals_sync() RETURNS trigger AS $$ BEGIN '
+        + UPSERT.replace('FROM transactions', 'FROM (SELECT NEW.*) AS transactions').format(condition='true')
+        + '; RETURN NEW; END $$ LANGUAGE plpgsql'
+    )
+    op.execute(
+        'CREATE TRIGGER account_daily_totals_sync AFTER INSERT ON transactions '
+        'FOR EACH ROW EXECUTE FUNCTION account_daily_totals_sync()'
+    )
+    if op.get_context().as_sql:
+        op.execute(UPSERT.format(condition='true'))
+    else:
+        # Триггер блокирует вставку до конца транзакции, поэтому платежи с большим ID учтены триггером
+        max_id = op.get_bind().scalar(sa.text('SELECT max(id) FROM transactions')) or 0
+        with op.get_context().autocommit_block():
+            for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+                op.get_bind().execute(
+                    sa.text(UPSERT.format(condition='id > :start AND id <= :end')),
+                    {'start': start, 'end': min(start + BACKFILL_BATCH_SIZE, max_id)},
+                )
+
+    # Дальше итоги обновляет приложение в транзакции проведения платежа
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute('DROP TRIGGER account_daily_totals_sync ON transactions')
+    op.execute('DROP FUNCTION account_daily_totals_sync()')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('account_daily_totals')
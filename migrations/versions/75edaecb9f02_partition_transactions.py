@@ -0,0 +1,158 @@
+"""partition_transactions
+
+До миграции время проведения платежей не хранилось, и других источников этого времени в БД нет, поэтому
+всем существующим платежам created_at устанавливается равным времени миграции. Вся история попадает
+в секцию, присоединенную из исходной таблицы, а выгрузки и выборки по периоду относят ее к месяцу миграции.
+
+Revision ID: 75edaecb9f02
+Revises: df9f656e1f4a
+Create Date: 2026-10-17 16:42:18.204511
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '75edaecb9f02'
+down_revision: Union[str, None] = 'df9f656e1f4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+# Количество месяцев, секции которых создаются заранее (далее - командой python -m database.partitions create)
+MONTHS_AHEAD = 3
+LOCK_TIMEOUT = '5s'
+
+
+def add_months(month: date, months: int) -> date:
+    """Первое число месяца, отстоящего от month на months месяцев."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Существующая таблица становится первой секцией (все строки до начала следующего месяца):
+    # ограничение проверяется заранее без блокировки записи, поэтому присоединение секции не сканирует таблицу
+    today = datetime.now(timezone.utc).date()
+    bound = add_months(today.replace(day=1), 1)
+
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    # Значение по умолчанию now() вычисляется один раз, таблица не переписывается. Существующие платежи
+    # получают время миграции: настоящее время их проведения не сохранялось
+    op.add_column('transactions', sa.Column('created_at', sa.DateTime(timezone=True),
+                                            server_default=sa.text('now()'), nullable=False))
+    op.create_table('transaction_keys',
+                    sa.Column('transaction_id', sa.String(), nullable=False),
+                    sa.PrimaryKeyConstraint('transaction_id')
+                    )
+    # Ключи платежей, проведенных во время миграции, записываются триггером
+    op.execute(
+        'CREATE FUNCTION transactions_keys_sync() RETURNS trigger AS $$ BEGIN '
+        'INSERT INTO transaction_keys (transaction_id) VALUES (NEW.transaction_id) ON CONFLICT DO NOTHING; '
+        'RETURN NEW; END $$ LANGUAGE plpgsql'
+    )
+    op.execute(
+        'CREATE TRIGGER transactions_keys_sync AFTER INSERT ON transactions '
+        'FOR EACH ROW WHEN (NEW.transaction_id IS NOT NULL) EXECUTE FUNCTION transactions_keys_sync()'
+    )
+    op.execute(
+        f"ALTER TABLE transactions ADD CONSTRAINT transactions_legacy_created_at_check "
+        f"CHECK (created_at < '{bound.isoformat()} 00:00:00+00') NOT VALID"
+    )
+
+    with op.get_context().autocommit_block():
+        backfill_keys()
+        op.execute('ALTER TABLE transactions VALIDATE CONSTRAINT transactions_legacy_created_at_check')
+        op.create_index('transactions_legacy_id_created_at_idx', 'transactions', ['id', 'created_at'],
+                        unique=True, postgresql_concurrently=True, if_not_exists=True)
+
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute('DROP TRIGGER transactions_keys_sync ON transactions')
+    op.execute('DROP FUNCTION transactions_keys_sync()')
+    op.rename_table('transactions', 'transactions_legacy')
+    # Первичный ключ секции совпадает с ключом секционированной таблицы, индексы - с ее индексами
+    op.execute(
+        'ALTER TABLE transactions_legacy DROP CONSTRAINT transactions_pkey, '
+        'ADD CONSTRAINT transactions_legacy_pkey PRIMARY KEY USING INDEX transactions_legacy_id_created_at_idx'
+    )
+    op.drop_index('ix_transactions_id', table_name='transactions_legacy')
+    op.drop_index('ix_transactions_transaction_id', table_name='transactions_legacy')
+    op.execute('ALTER INDEX ix_transactions_user_id_id RENAME TO transactions_legacy_user_id_id_idx')
+    op.execute('ALTER INDEX ix_transactions_account_id_id RENAME TO transactions_legacy_account_id_id_idx')
+    for column in ('account_id', 'user_id'):
+        op.execute(f'ALTER TABLE transactions_legacy RENAME CONSTRAINT transactions_{column}_fkey '
+                   f'TO transactions_legacy_{column}_fkey')
+
+    op.create_table('transactions',
+                    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('transactions_id_seq')"),
+                              nullable=False),
+                    sa.Column('transaction_id', sa.String(), nullable=True),
+                    sa.Column('account_id', sa.Integer(), nullable=True),
+                    sa.Column('user_id', sa.Integer(), nullable=True),
+                    sa.Column('amount', sa.Numeric(precision=18, scale=2), nullable=True),
+                    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+                    sa.PrimaryKeyConstraint('id', 'created_at'),
+                    postgresql_partition_by='RANGE (created_at)'
+                    )
+    op.execute('ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id')
+    op.create_index('ix_transactions_user_id_id', 'transactions', ['user_id', 'id'], unique=False)
+    op.create_index('ix_transactions_account_id_id', 'transactions', ['account_id', 'id'], unique=False)
+    op.execute(
+        f"ALTER TABLE transactions ATTACH PARTITION transactions_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{bound.isoformat()} 00:00:00+00')"
+    )
+    op.execute('ALTER TABLE transactions_legacy DROP CONSTRAINT transactions_legacy_created_at_check')
+
+    for months in range(MONTHS_AHEAD):
+        start, end = add_months(bound, months), add_months(bound, months + 1)
+        op.execute(
+            f"CREATE TABLE transactions_y{start.year}m{start.month:02d} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+        )
+
+
+def backfill_keys() -> None:
+    """Заполняет transaction_keys пачками по диапазонам id."""
+    if op.get_context().as_sql:
+        op.execute(
+            'INSERT INTO transaction_keys (transaction_id) SELECT transaction_id FROM transactions '
+            'WHERE transaction_id IS NOT NULL ON CONFLICT DO NOTHING'
+        )
+        return
+    connection = op.get_bind()
+    max_id = connection.scalar(sa.text('SELECT max(id) FROM transactions')) or 0
+    for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        connection.execute(
+            sa.text(
+                'INSERT INTO transaction_keys (transaction_id) SELECT transaction_id FROM transactions '
+                'WHERE id > :start AND id <= :end AND transaction_id IS NOT NULL ON CONFLICT DO NOTHING'
+            ),
+            {'start': start, 'end': start + BACKFILL_BATCH_SIZE},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Данные всех секций копируются в обычную таблицу, поэтому откат выполняют в окно обслуживания
+    op.execute('CREATE TABLE transactions_plain (LIKE transactions INCLUDING DEFAULTS)')
+    op.execute('INSERT INTO transactions_plain SELECT * FROM transactions')
+    op.execute('ALTER SEQUENCE transactions_id_seq OWNED BY transactions_plain.id')
+    op.drop_table('transactions')
+    op.rename_table('transactions_plain', 'transactions')
+    op.create_primary_key('transactions_pkey', 'transactions', ['id'])
+    op.create_foreign_key('transactions_account_id_fkey', 'transactions', 'accounts', ['account_id'], ['id'])
+    op.create_foreign_key('transactions_user_id_fkey', 'transactions', 'users', ['user_id'], ['id'])
+    op.create_index('ix_transactions_id', 'transactions', ['id'], unique=False)
+    op.create_index('ix_transactions_transaction_id', 'transactions', ['transaction_id'], unique=True)
+    op.create_index('ix_transactions_user_id_id', 'transactions', ['user_id', 'id'], unique=False)
+    op.create_index('ix_transactions_account_id_id', 'transactions', ['account_id', 'id'], unique=False)
+    op.drop_column('transactions', 'created_at')
+    op.drop_table('transaction_keys')
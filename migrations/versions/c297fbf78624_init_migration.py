@@ -11,7 +11,7 @@ import sqlalchemy as sa
 from alembic import op
 from sqlalchemy import column, table
 
-from routers.auth import bcrypt_context
+from routers.services.hashing import bcrypt_context
 
 
 # revision identifiers, used by Alembic.
@@ -0,0 +1,85 @@
+"""numeric_money
+
+Revision ID: df9f656e1f4a
+Revises: fa053d654313
+Create Date: 2026-10-17 14:05:37.512093
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'df9f656e1f4a'
+down_revision: Union[str, None] = 'fa053d654313'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Денежные колонки: таблица и колонка
+MONEY_COLUMNS = (('accounts', 'total'), ('transactions', 'amount'))
+MONEY_TYPE = 'NUMERIC(18, 2)'
+BACKFILL_BATCH_SIZE = 10000
+# Миграция не ждет блокировку дольше, чтобы не останавливать запросы за долгими транзакциями
+LOCK_TIMEOUT = '5s'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ALTER COLUMN TYPE переписывает таблицу под эксклюзивной блокировкой, поэтому значения копируются
+    # в новую колонку: триггер заполняет ее при записи, старые строки заполняются пачками, затем колонки
+    # меняются местами короткой операцией над метаданными
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    for table, column in MONEY_COLUMNS:
+        op.execute(f'ALTER TABLE {table} ADD COLUMN {column}_numeric {MONEY_TYPE}')
+        op.execute(
+            f'CREATE FUNCTION {table}_{column}_numeric_sync() RETURNS trigger AS $$ '
+            f'BEGIN NEW.{column}_numeric := NEW.{column}; RETURN NEW; END $$ LANGUAGE plpgsql'
+        )
+        op.execute(
+            f'CREATE TRIGGER {table}_{column}_numeric_sync BEFORE INSERT OR UPDATE ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION {table}_{column}_numeric_sync()'
+        )
+
+    # Заполнение и индекс - вне транзакции миграции, каждая пачка коммитится отдельно
+    with op.get_context().autocommit_block():
+        for table, column in MONEY_COLUMNS:
+            backfill(table, column)
+        op.create_index('ix_accounts_user_id', 'accounts', ['user_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    for table, column in MONEY_COLUMNS:
+        # Строки, записанные после создания триггера, заполнены им, остальные - пачками
+        op.execute(f'DROP TRIGGER {table}_{column}_numeric_sync ON {table}')
+        op.execute(f'DROP FUNCTION {table}_{column}_numeric_sync()')
+        op.execute(f'ALTER TABLE {table} DROP COLUMN {column}')
+        op.execute(f'ALTER TABLE {table} RENAME COLUMN {column}_numeric TO {column}')
+
+
+def backfill(table: str, column: str) -> None:
+    """Заполняет новую колонку пачками по диапазонам id, чтобы не держать блокировки строк долго."""
+    if op.get_context().as_sql:
+        op.execute(f'UPDATE {table} SET {column}_numeric = {column} WHERE {column}_numeric IS NULL')
+        return
+    connection = op.get_bind()
+    max_id = connection.scalar(sa.text(f'SELECT max(id) FROM {table}')) or 0
+    for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        connection.execute(
+            sa.text(
+                f'UPDATE {table} SET {column}_numeric = {column} '
+                f'WHERE id > :start AND id <= :end AND {column}_numeric IS NULL'
+            ),
+            {'start': start, 'end': start + BACKFILL_BATCH_SIZE},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_accounts_user_id', table_name='accounts',
+                      postgresql_concurrently=True, if_exists=True)
+    # Обратное преобразование переписывает таблицы, его выполняют в окно обслуживания
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(table, column, type_=sa.Float(), postgresql_using=f'{column}::double precision')
@@ -0,0 +1,36 @@
+"""transactions_keyset_indexes
+
+Revision ID: e183ab955d96
+Revises: c297fbf78624
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e183ab955d96'
+down_revision: Union[str, None] = 'c297fbf78624'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индексы строятся без блокировки записи в таблицу, поэтому вне транзакции миграции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_transactions_user_id_id', 'transactions', ['user_id', 'id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_transactions_account_id_id', 'transactions', ['account_id', 'id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_transactions_account_id_id', table_name='transactions',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_transactions_user_id_id', table_name='transactions',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,43 @@
+"""refresh_tokens
+
+Revision ID: fa053d654313
+Revises: 0cd7d17f05f4
+Create Date: 2026-10-17 12:20:15.102384
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fa053d654313'
+down_revision: Union[str, None] = '0cd7d17f05f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('refresh_tokens',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('family_id', sa.String(length=32), nullable=False),
+                    sa.Column('token_hash', sa.String(length=64), nullable=False),
+                    sa.Column('token_version', sa.Integer(), nullable=False),
+                    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('used_at', sa.DateTime(timezone=True), nullable=True),
+                    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('token_hash')
+                    )
+    op.create_index(op.f('ix_refresh_tokens_family_id'), 'refresh_tokens', ['family_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_refresh_tokens_family_id'), table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
@@ -0,0 +1,22 @@
+"""Модуль с описанием таблицы дневных итогов платежей по счетам в БД."""
+
+from sqlalchemy import Date, ForeignKey, Integer, Numeric
+from sqlalchemy.orm import mapped_column
+
+from database.db import Base
+
+
+class AccountDailyTotal(Base):
+    """
+    Таблица дневных итогов платежей по счетам.
+
+    Строка дня обновляется в транзакции проведения платежа, поэтому выписка за период
+    читает по одной строке на день вместо всех платежей счета.
+    """
+
+    __tablename__ = "account_daily_totals"
+
+    account_id = mapped_column(Integer, ForeignKey("accounts.id"), primary_key=True)
+    day = mapped_column(Date, primary_key=True)
+    credits = mapped_column(Integer, nullable=False, default=0)
+    total = mapped_column(Numeric(18, 2), nullable=False, default=0)
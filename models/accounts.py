@@ -1,6 +1,6 @@
 """Модуль с описанием таблицы счета в БД."""
 
-from sqlalchemy import Float, ForeignKey, Integer
+from sqlalchemy import ForeignKey, Integer, Numeric
 from sqlalchemy.orm import mapped_column, relationship
 
 from database.db import Base
@@ -12,8 +12,8 @@ class Account(Base):
     __tablename__ = "accounts"
 
     id = mapped_column(Integer, primary_key=True, index=True)
-    total = mapped_column(Float, default=0)
-    user_id = mapped_column(Integer, ForeignKey("users.id"))
+    total = mapped_column(Numeric(18, 2), default=0)
+    user_id = mapped_column(Integer, ForeignKey("users.id"), index=True)
 
     user = relationship("User", back_populates="account")
     transaction = relationship("Transaction", back_populates="account")
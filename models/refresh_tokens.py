@@ -0,0 +1,26 @@
+"""Модуль с описанием таблицы токенов обновления в БД."""
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, func
+from sqlalchemy.orm import mapped_column
+
+from database.db import Base
+
+
+class RefreshToken(Base):
+    """
+    Таблица токенов обновления.
+
+    Хранится только SHA-256 токена. Токены, полученные один из другого при обновлении, образуют цепочку
+    с общим family_id, повторное использование токена цепочки отзывает ее целиком.
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    id = mapped_column(Integer, primary_key=True)
+    user_id = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    family_id = mapped_column(String(32), nullable=False, index=True)
+    token_hash = mapped_column(String(64), nullable=False, unique=True)
+    token_version = mapped_column(Integer, nullable=False)
+    expires_at = mapped_column(DateTime(timezone=True), nullable=False)
+    used_at = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
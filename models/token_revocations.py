@@ -0,0 +1,17 @@
+"""Модуль с описанием таблицы отзыва токенов в БД."""
+
+from sqlalchemy import DateTime, ForeignKey, Integer, func
+from sqlalchemy.orm import mapped_column
+
+from database.db import Base
+
+
+class TokenRevocation(Base):
+    """Таблица отзыва токенов: токены пользователя с версией ниже token_version недействительны."""
+
+    __tablename__ = "token_revocations"
+
+    id = mapped_column(Integer, primary_key=True)
+    user_id = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    token_version = mapped_column(Integer, nullable=False)
+    revoked_at = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
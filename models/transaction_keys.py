@@ -0,0 +1,19 @@
+"""Модуль с описанием таблицы ключей платежей в БД."""
+
+from sqlalchemy import String
+from sqlalchemy.orm import mapped_column
+
+from database.db import Base
+
+
+class TransactionKey(Base):
+    """
+    Таблица проведенных transaction_id.
+
+    Уникальный индекс секционированной таблицы transactions должен включать ключ секционирования,
+    поэтому уникальность transaction_id во всех секциях обеспечивает эта таблица.
+    """
+
+    __tablename__ = "transaction_keys"
+
+    transaction_id = mapped_column(String, primary_key=True)
@@ -1,21 +1,32 @@
 """Модуль с описанием таблицы транзакций в БД."""
 
-from sqlalchemy import Float, ForeignKey, Integer, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Numeric, String, func
 from sqlalchemy.orm import mapped_column, relationship
 
 from database.db import Base
 
 
 class Transaction(Base):
-    """Таблица платежей."""
+    """
+    Таблица платежей.
+
+    В PostgreSQL таблица секционирована по месяцам created_at, первичный ключ - (id, created_at),
+    уникальность transaction_id обеспечивает таблица transaction_keys. Схема создается миграциями,
+    в модели id остается первичным ключом: он уникален благодаря последовательности.
+    """
 
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_user_id_id", "user_id", "id"),
+        Index("ix_transactions_account_id_id", "account_id", "id"),
+    )
 
-    id = mapped_column(Integer, primary_key=True, index=True)
-    transaction_id = mapped_column(String, unique=True, index=True)
+    id = mapped_column(Integer, primary_key=True)
+    transaction_id = mapped_column(String)
     account_id = mapped_column(Integer, ForeignKey("accounts.id"))
     user_id = mapped_column(Integer, ForeignKey("users.id"))
-    amount = mapped_column(Float)
+    amount = mapped_column(Numeric(18, 2))
+    created_at = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
     account = relationship("Account", back_populates="transaction")
     user = relationship("User", back_populates="transaction")
@@ -19,6 +19,7 @@ class User(Base):
     password = mapped_column(String)
     is_active = mapped_column(Boolean, default=True)
     is_admin = mapped_column(Boolean, default=False)
+    token_version = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     account = relationship("Account", back_populates="user")
     transaction = relationship("Transaction", back_populates="user")
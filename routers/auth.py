@@ -4,21 +4,25 @@ from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 import jwt
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Response, status
 from fastapi.params import Depends
 from fastapi.security import HTTPBasic, OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from passlib.context import CryptContext
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
 from database.db_depends import get_db
 from models.users import User
+from routers.services.hashing import password_hasher
+from routers.services.keyring import keyring
+from routers.services.refresh_tokens import issue_refresh_token, use_refresh_token
+from routers.services.revocation import revoked_tokens
+from routers.services.token_cache import token_cache
+from schemas import RefreshTokenSchema
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBasic()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
@@ -39,12 +43,22 @@ async def authenticate_user(db: Annotated[AsyncSession, Depends(get_db)], userna
         HTTPException: Если аутентификация не удалась.
     """
     user = await db.scalar(select(User).where(User.username == username))
-    if not user or not bcrypt_context.verify(password, user.password) or not user.is_active:
+    # Пароль проверяется bcrypt в любом случае, чтобы время ответа не выдавало, существует ли пользователь
+    # и активен ли он
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(password, user.password)
+    else:
+        valid, new_hash = await password_hasher.verify_dummy(password), None
+    if not valid or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Хэш со стоимостью ниже текущей пересчитывается при успешном входе
+        user.password = new_hash
+        await db.commit()
     return user
 
 
@@ -53,6 +67,7 @@ async def create_access_token(
     username: str,
     is_admin: bool,
     expires_delta: timedelta,
+    token_version: int = 0,
 ) -> bytes:
     """
     Создание токена.
@@ -62,6 +77,7 @@ async def create_access_token(
         username(str): Имя пользователя.
         is_admin(bool): Флаг администратора.
         expires_delta(timedelta): Срок действия токена.
+        token_version(int): Версия токенов пользователя, токены с версией ниже текущей отозваны.
 
     Returns:
         bytes: Токен.
@@ -70,27 +86,53 @@ async def create_access_token(
         "username": username,
         "id": user_id,
         "is_admin": is_admin,
+        "ver": token_version,
         "exp": datetime.now(timezone.utc) + expires_delta,
     }
     payload["exp"] = int(payload["exp"].timestamp())
-    return jwt.encode(payload, config.SECRET_KEY, algorithm=config.ALGORITHM)
+    return keyring.sign(payload)
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
     """
     Предоставления пользователя.
 
+    Проверенные токены запоминаются до истечения срока действия, повторный запрос с тем же токеном
+    не проверяет подпись заново. Отзыв токенов проверяется по списку в памяти без обращения к БД.
+
     Args:
         token(str): Токен пользователя.
 
     Returns:
         dict: Объект пользователя, если токен действителен, иначе вызывается исключение.
 
+    Raises:
+        HTTPException: Если токен не действителен.
+    """
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        token_cache.add(token, claims, claims["exp"])
+    if revoked_tokens.is_revoked(claims["id"], claims["ver"]):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    return {"username": claims["username"], "id": claims["id"], "is_admin": claims["is_admin"]}
+
+
+def decode_token(token: str) -> dict:
+    """
+    Проверка подписи и срока действия токена.
+
+    Args:
+        token(str): Токен пользователя.
+
+    Returns:
+        dict: Данные пользователя, версия (ver) и время истечения срока действия токена (exp).
+
     Raises:
         HTTPException: Если токен не действителен.
     """
     try:
-        payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
+        payload = keyring.decode(token)
         username: str | None = payload.get("username")
         user_id: int | None = payload.get("id")
         is_admin: bool | None = payload.get("is_admin")
@@ -119,11 +161,13 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> dic
             "username": username,
             "id": user_id,
             "is_admin": is_admin,
+            "ver": payload.get("ver", 0),
+            "exp": expire,
         }
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired!")
-    except jwt.exceptions:
+    except jwt.PyJWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate user")
 
 
@@ -140,14 +184,84 @@ async def login(
         form_data(OAuth2PasswordRequestForm): Форма авторизации пользователя.
 
     Returns:
-        dict: Токен пользователя.
+        dict: Токен доступа и токен обновления пользователя.
     """
     user = await authenticate_user(db, form_data.username, form_data.password)
+    return await issue_tokens(db, user)
+
+
+@router.post("/refresh")
+async def refresh(db: Annotated[AsyncSession, Depends(get_db)], refresh_data: RefreshTokenSchema) -> dict:
+    """
+    Обмен токена обновления на новую пару токенов без проверки пароля.
+
+    Токен обновления одноразовый: при обмене он помечается использованным и выдается новый.
+    Повторное использование токена отзывает всю цепочку полученных из него токенов.
+
+    Args:
+        db(AsyncSession): Сессия базы данных.
+        refresh_data(RefreshTokenSchema): Токен обновления.
+
+    Returns:
+        dict: Токен доступа и токен обновления пользователя.
+
+    Raises:
+        HTTPException: Если токен обновления недействителен или токены пользователя отозваны.
+    """
+    refresh_token = await use_refresh_token(db, refresh_data.refresh_token)
+    user = None
+    if refresh_token is not None:
+        user = await db.scalar(select(User).where(User.id == refresh_token.user_id))
+    if not user or not user.is_active or user.token_version != refresh_token.token_version:
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await issue_tokens(db, user, family_id=refresh_token.family_id)
+
+
+async def issue_tokens(db: AsyncSession, user: User, family_id: str | None = None) -> dict:
+    """
+    Выдача токена доступа и токена обновления.
+
+    Args:
+        db(AsyncSession): Сессия базы данных.
+        user(User): Пользователь.
+        family_id(str | None): Цепочка токенов обновления, по умолчанию новая.
+
+    Returns:
+        dict: Токен доступа, срок его действия в секундах и токен обновления.
+    """
+    expires_delta = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
     token = await create_access_token(
         user.id,
         user.username,
         user.is_admin,
-        expires_delta=timedelta(minutes=100),
+        expires_delta=expires_delta,
+        token_version=user.token_version,
     )
+    refresh_token = await issue_refresh_token(db, user.id, user.token_version, family_id)
+    await db.commit()
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "expires_in": int(expires_delta.total_seconds()),
+        "refresh_token": refresh_token,
+    }
+
 
-    return {"access_token": token, "token_type": "bearer"}
+@router.get("/.well-known/jwks.json")
+async def jwks() -> Response:
+    """
+    Открытые ключи для проверки токенов другими сервисами.
+
+    Returns:
+        Response: Ключи в формате JWKS.
+    """
+    return Response(
+        content=keyring.jwks(),
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={config.JWKS_MAX_AGE}"},
+    )
@@ -0,0 +1,130 @@
+"""Модуль со служебными эндпоинтами для мониторинга приложения."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException
+from fastapi.params import Depends
+from starlette import status
+
+import config
+from database.db import engine
+from database.partitions import check_partitions
+from routers.auth import get_current_user
+from routers.services.cache import cache
+from routers.services.hashing import password_hasher
+from routers.services.revocation import revoked_tokens
+from routers.services.token_cache import token_cache
+
+
+router = APIRouter(prefix="/internal", tags=["internal"])
+
+
+@router.get("/hashing")
+async def hashing_pool_stats(get_user: Annotated[dict, Depends(get_current_user)]) -> dict:
+    """
+    Получение статистики пула хэширования паролей.
+
+    Args:
+        get_user (dict): Текущий пользователь.
+
+    Returns:
+        dict: Статистика загрузки пула хэширования.
+
+    Raises:
+        HTTPException: Если у пользователя нет прав администратора.
+    """
+    if not get_user["is_admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission",
+        )
+    return password_hasher.stats()
+
+
+@router.get("/pool")
+async def db_pool_stats(get_user: Annotated[dict, Depends(get_current_user)]) -> dict:
+    """
+    Получение статистики пула соединений с БД.
+
+    Args:
+        get_user (dict): Текущий пользователь.
+
+    Returns:
+        dict: Статистика пула соединений текущего воркера.
+
+    Raises:
+        HTTPException: Если у пользователя нет прав администратора.
+    """
+    if not get_user["is_admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission",
+        )
+    return engine.pool.stats()
+
+
+@router.get("/partitions")
+async def partitions_status(get_user: Annotated[dict, Depends(get_current_user)]) -> dict:
+    """
+    Проверка секций таблицы платежей.
+
+    Args:
+        get_user (dict): Текущий пользователь.
+
+    Returns:
+        dict: Секции текущего месяца и PARTITION_MONTHS_AHEAD месяцев после него, которых нет в БД.
+
+    Raises:
+        HTTPException: Если у пользователя нет прав администратора.
+    """
+    if not get_user["is_admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission",
+        )
+    missing = await check_partitions(config.PARTITION_MONTHS_AHEAD)
+    return {"months_ahead": config.PARTITION_MONTHS_AHEAD, "missing": missing}
+
+
+@router.get("/cache")
+async def cache_stats(get_user: Annotated[dict, Depends(get_current_user)]) -> dict:
+    """
+    Получение статистики кэша чтения.
+
+    Args:
+        get_user (dict): Текущий пользователь.
+
+    Returns:
+        dict: Количество попаданий и промахов кэша текущего воркера.
+
+    Raises:
+        HTTPException: Если у пользователя нет прав администратора.
+    """
+    if not get_user["is_admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission",
+        )
+    return cache.stats()
+
+
+@router.get("/tokens")
+async def token_cache_stats(get_user: Annotated[dict, Depends(get_current_user)]) -> dict:
+    """
+    Получение статистики кэша проверенных токенов.
+
+    Args:
+        get_user (dict): Текущий пользователь.
+
+    Returns:
+        dict: Размер кэша, количество попаданий и промахов, статистика отзыва токенов текущего воркера.
+
+    Raises:
+        HTTPException: Если у пользователя нет прав администратора.
+    """
+    if not get_user["is_admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission",
+        )
+    return {**token_cache.stats(), "revocations": revoked_tokens.stats()}
@@ -0,0 +1,21 @@
+"""Модуль с эндпоинтом метрик в формате Prometheus."""
+
+from fastapi import APIRouter, Response
+
+from routers.services.metrics import metrics
+
+
+router = APIRouter(tags=["internal"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    """
+    Метрики текущего воркера для Prometheus.
+
+    Эндпоинт не требует авторизации, доступ к нему ограничивается на уровне сети.
+
+    Returns:
+        Response: Метрики в текстовом формате Prometheus.
+    """
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
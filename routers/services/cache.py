@@ -0,0 +1,244 @@
+"""Модуль с кэшем профилей пользователей и балансов счетов."""
+
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+def user_key(user_id: int) -> str:
+    """Ключ кэша профиля пользователя."""
+    return f"user:{user_id}"
+
+
+def accounts_key(user_id: int) -> str:
+    """Ключ кэша счетов пользователя."""
+    return f"accounts:{user_id}"
+
+
+def version_key(key: str) -> str:
+    """Ключ версии значения кэша."""
+    return f"version:{key}"
+
+
+class CacheBackend(ABC):
+    """
+    Базовый класс хранилища кэша. Значения должны сериализоваться в JSON.
+
+    Значения хранятся под ключами с версией. Сброс увеличивает версию ключа, поэтому значение, загруженное
+    до изменения данных и сохраненное после сброса, попадает под прежнюю версию и больше не читается.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None:
+        """Получение значения по ключу, None если значения нет."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """Сохранение значения на ttl секунд."""
+
+    @abstractmethod
+    async def version(self, key: str) -> int:
+        """Текущая версия ключа, 0 если ключ не сбрасывался."""
+
+    @abstractmethod
+    async def bump(self, *keys: str) -> None:
+        """Увеличение версий ключей."""
+
+
+class MemoryCache(CacheBackend):
+    """
+    Кэш в памяти процесса с ограничением размера (LRU) и временем жизни значений.
+
+    Сброс виден только процессу, в котором он выполнен, поэтому кэш подходит лишь для запуска с одним
+    воркером. При нескольких воркерах используется RedisCache.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Инициализация кэша.
+
+        Args:
+            max_size(int): Максимальное количество хранимых значений.
+        """
+        self.max_size = max_size
+        self._items: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        # Версии не вытесняются: иначе версия сбросится к 0 и снова откроет устаревшее значение
+        self._versions: dict[str, int] = {}
+
+    async def get(self, key: str) -> Any | None:
+        """Получение значения по ключу, None если значения нет или оно устарело."""
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """Сохранение значения на ttl секунд с вытеснением самого давнего при переполнении."""
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    async def version(self, key: str) -> int:
+        """Текущая версия ключа, 0 если ключ не сбрасывался."""
+        return self._versions.get(key, 0)
+
+    async def bump(self, *keys: str) -> None:
+        """Увеличение версий ключей."""
+        for key in keys:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+
+class RedisCache(CacheBackend):
+    """Кэш в Redis или любом сервере, совместимом с протоколом Redis, общий для всех воркеров."""
+
+    def __init__(self, client: Any) -> None:
+        """
+        Инициализация кэша.
+
+        Args:
+            client(Any): Асинхронный клиент Redis (redis.asyncio.Redis или совместимый).
+        """
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCache":
+        """
+        Создает кэш по адресу сервера.
+
+        Args:
+            url(str): Адрес сервера, например redis://localhost:6379/0.
+
+        Returns:
+            RedisCache: Кэш.
+        """
+        try:
+            from redis import asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package: poetry install -E redis") from exc
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> Any | None:
+        """Получение значения по ключу, None если значения нет."""
+        value = await self.client.get(key)
+        return None if value is None else json.loads(value)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """Сохранение значения на ttl секунд."""
+        await self.client.set(key, json.dumps(value), px=int(ttl * 1000))
+
+    async def version(self, key: str) -> int:
+        """Текущая версия ключа, 0 если ключ не сбрасывался."""
+        value = await self.client.get(version_key(key))
+        return 0 if value is None else int(value)
+
+    async def bump(self, *keys: str) -> None:
+        """Увеличение версий ключей командой INCR."""
+        for key in keys:
+            await self.client.incr(version_key(key))
+
+
+class Cache:
+    """Кэш чтения со счетчиками попаданий и промахов."""
+
+    def __init__(self, backend: CacheBackend, ttl: float) -> None:
+        """
+        Инициализация кэша.
+
+        Args:
+            backend(CacheBackend): Хранилище кэша.
+            ttl(float): Время жизни значений в секундах.
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Возвращает значение из кэша, а при его отсутствии загружает и сохраняет.
+
+        Значение None не кэшируется. Ошибки хранилища не прерывают запрос: значение загружается из БД.
+        Загруженное значение сохраняется под версией ключа, прочитанной до загрузки, поэтому load должна
+        читать основную БД: значение с отстающей реплики устарело бы уже для новой версии.
+
+        Args:
+            key(str): Ключ.
+            load(Callable): Функция загрузки значения из основной БД.
+
+        Returns:
+            Any: Значение.
+        """
+        stored_key = None
+        value = None
+        try:
+            stored_key = f"{key}@{await self.backend.version(key)}"
+            value = await self.backend.get(stored_key)
+        except Exception:
+            self.errors += 1
+            logger.warning("Cache get failed for %s", key, exc_info=True)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await load()
+        if value is not None and stored_key is not None:
+            try:
+                await self.backend.set(stored_key, value, self.ttl)
+            except Exception:
+                self.errors += 1
+                logger.warning("Cache set failed for %s", key, exc_info=True)
+        return value
+
+    async def invalidate(self, *keys: str) -> None:
+        """
+        Сбрасывает значения кэша после изменения данных увеличением версий ключей.
+
+        Args:
+            *keys(str): Ключи.
+        """
+        try:
+            await self.backend.bump(*keys)
+        except Exception:
+            self.errors += 1
+            logger.warning("Cache invalidation failed for %s", keys, exc_info=True)
+
+    def stats(self) -> dict:
+        """
+        Статистика кэша.
+
+        Returns:
+            dict: Тип хранилища, количество попаданий, промахов и ошибок.
+        """
+        requests = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+        }
+
+
+def create_backend() -> CacheBackend:
+    """Создает хранилище кэша согласно CACHE_BACKEND."""
+    if config.CACHE_BACKEND == "redis":
+        return RedisCache.from_url(config.CACHE_REDIS_URL)
+    return MemoryCache(max_size=config.CACHE_MAX_SIZE)
+
+
+cache = Cache(create_backend(), ttl=config.CACHE_TTL)
@@ -0,0 +1,65 @@
+"""Модуль с потоковой выгрузкой платежей."""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+
+EXPORT_FIELDS = ("id", "transaction_id", "account_id", "amount", "created_at")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _json_default(value: object) -> object:
+    """Сериализует даты в ISO 8601, суммы Decimal - строками без потери точности."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _ndjson_chunk(rows: list) -> str:
+    """Сериализует пачку строк в NDJSON."""
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False, default=_json_default) + "\n" for row in rows
+    )
+
+
+def _csv_chunk(rows: list, header: bool = False) -> str:
+    """Сериализует пачку строк в CSV."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+async def stream_transactions(
+    session_factory: async_sessionmaker, query: Select, export_format: str, chunk_size: int
+) -> AsyncIterator[str]:
+    """
+    Потоково выгружает платежи через серверный курсор.
+
+    Для выгрузки открывается отдельная сессия, так как сессия запроса закрывается до начала
+    отправки тела ответа. Строки читаются из курсора пачками по chunk_size, поэтому потребление
+    памяти не зависит от количества платежей.
+
+    Args:
+        session_factory(async_sessionmaker): Фабрика сессий для выгрузки.
+        query(Select): Запрос, возвращающий колонки EXPORT_FIELDS.
+        export_format(str): Формат выгрузки: "ndjson" или "csv".
+        chunk_size(int): Количество строк, читаемых из курсора за раз.
+
+    Yields:
+        str: Очередная часть выгрузки.
+    """
+    if export_format == "csv":
+        yield _csv_chunk([], header=True)
+    async with session_factory() as session:
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions():
+            yield _csv_chunk(rows) if export_format == "csv" else _ndjson_chunk(rows)
@@ -0,0 +1,119 @@
+"""Модуль с групповым коммитом одиночных платежей."""
+
+import asyncio
+
+import config
+from database.db import Session
+from routers.services.payments import DUPLICATE, apply_payments
+from schemas import WebhookRequestSchema
+
+
+class PaymentCommitter:
+    """Очередь платежей, которые проводятся пачками с одним коммитом на пачку."""
+
+    def __init__(self, max_batch: int, linger: float) -> None:
+        """
+        Инициализация очереди.
+
+        Args:
+            max_batch(int): Максимальное количество платежей в пачке.
+            linger(float): Максимальное время ожидания пополнения пачки в секундах.
+        """
+        self.max_batch = max_batch
+        self.linger = linger
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Запущен ли коммиттер."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Запускает фоновую задачу коммиттера."""
+        self._queue = asyncio.Queue(maxsize=self.max_batch * 10)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Проводит платежи из очереди и останавливает фоновую задачу."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, payment: WebhookRequestSchema) -> str:
+        """
+        Ставит платеж в очередь и ждет коммита пачки, в которую он попал.
+
+        Args:
+            payment(WebhookRequestSchema): Проверенный платеж.
+
+        Returns:
+            str: Статус проведения платежа (applied или duplicate).
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((payment, future))
+        return await future
+
+    async def _collect(self) -> list:
+        """Собирает пачку: ждет первый платеж, затем добирает до max_batch не дольше linger."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.linger
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        """Цикл фоновой задачи: сбор и коммит пачек."""
+        while True:
+            batch = await self._collect()
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: list) -> None:
+        """
+        Проводит пачку платежей одним коммитом и передает результат ожидающим запросам.
+
+        Args:
+            batch(list): Пары из платежа и future ожидающего запроса.
+        """
+        unique = {}
+        for payment, _ in batch:
+            unique.setdefault(payment.transaction_id, payment)
+        try:
+            async with Session() as session:
+                statuses = await apply_payments(session, unique.values())
+                await session.commit()
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for payment, future in batch:
+            if future.done():
+                continue
+            if unique[payment.transaction_id] is payment:
+                future.set_result(statuses[payment.transaction_id])
+            else:
+                future.set_result(DUPLICATE)
+
+
+payment_committer = PaymentCommitter(
+    max_batch=config.GROUP_COMMIT_MAX_BATCH,
+    linger=config.GROUP_COMMIT_LINGER_MS / 1000,
+)
@@ -0,0 +1,325 @@
+"""Модуль с сервисом хэширования паролей вне цикла событий."""
+
+import asyncio
+import functools
+import logging
+import secrets
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+import config
+from routers.services.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Пароль для замеров скорости хэширования
+_CALIBRATION_PASSWORD = "calibration-password"
+# Стоимость, на которой выполняется замер: достаточно велика для точного замера и быстро считается
+_CALIBRATION_ROUNDS = 8
+_MAX_ROUNDS = 20
+# Стоимость passlib по умолчанию: ниже нее новые пароли хэшируются слабее, чем до подбора стоимости
+DEFAULT_ROUNDS = 12
+
+
+def _configure(rounds: int) -> None:
+    """
+    Устанавливает стоимость хэширования bcrypt.
+
+    Новые пароли хэшируются с этой стоимостью, хэши с меньшей стоимостью считаются устаревшими
+    и пересчитываются при входе. Более стойкие хэши не понижаются.
+
+    Args:
+        rounds(int): Стоимость bcrypt (log2 количества итераций).
+    """
+    bcrypt_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+def _measure(rounds: int) -> float:
+    """Замеряет время хэширования пароля с указанной стоимостью в секундах (лучшее из трех)."""
+    handler = bcrypt_context.handler("bcrypt").using(rounds=rounds)
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        handler.hash(_CALIBRATION_PASSWORD)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def calibrate_rounds(target: float, min_rounds: int) -> int:
+    """
+    Подбирает максимальную стоимость bcrypt, при которой хэширование укладывается в целевое время.
+
+    Время bcrypt удваивается с каждой единицей стоимости, поэтому оно замеряется на низкой стоимости
+    и экстраполируется.
+
+    Args:
+        target(float): Целевое время хэширования одного пароля в секундах.
+        min_rounds(int): Минимально допустимая стоимость.
+
+    Returns:
+        int: Стоимость bcrypt.
+    """
+    base = _measure(_CALIBRATION_ROUNDS)
+    rounds = _CALIBRATION_ROUNDS
+    while rounds < _MAX_ROUNDS and base * 2 ** (rounds + 1 - _CALIBRATION_ROUNDS) <= target:
+        rounds += 1
+    return max(rounds, min_rounds)
+
+
+def _timed_call(func: Callable, *args: Any) -> tuple[Any, float]:
+    """
+    Выполняет функцию в воркере и замеряет время ее выполнения.
+
+    Args:
+        func(Callable): Функция для выполнения.
+        *args(Any): Аргументы функции.
+
+    Returns:
+        tuple[Any, float]: Результат функции и время выполнения в секундах.
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _hash(password: str) -> str:
+    """Хэширует пароль (выполняется в воркере пула)."""
+    return bcrypt_context.hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    """Проверяет пароль по хэшу (выполняется в воркере пула)."""
+    return bcrypt_context.verify(password, hashed_password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Проверяет пароль и пересчитывает устаревший хэш (выполняется в воркере пула)."""
+    return bcrypt_context.verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """Пул воркеров для хэширования и проверки паролей с ограничением очереди и таймаутом."""
+
+    def __init__(self, executor_type: str, max_workers: int, max_queue: int, timeout: float) -> None:
+        """
+        Инициализация пула.
+
+        Args:
+            executor_type(str): Тип пула: "thread" или "process".
+            max_workers(int): Количество воркеров.
+            max_queue(int): Максимальное количество задач, ожидающих свободного воркера.
+            timeout(float): Максимальное время ожидания результата в секундах.
+        """
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing executor type: {executor_type}")
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor: Executor | None = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._busy_time = 0.0
+        self._started_at = time.monotonic()
+        self.rounds = bcrypt_context.handler("bcrypt").default_rounds
+        self._dummy_hash: str | None = None
+
+    @property
+    def executor(self) -> Executor:
+        """Пул воркеров, создается при первом обращении."""
+        if self._executor is None:
+            if self.executor_type == "process":
+                # Процессы получают стоимость через initializer, так как не разделяют память с приложением
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=_configure, initargs=(self.rounds,)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hashing")
+        return self._executor
+
+    def _release(self, future: Future) -> None:
+        """Освобождает слот пула после фактического завершения задачи."""
+        self._in_flight -= 1
+        if not future.cancelled() and future.exception() is None:
+            self._completed += 1
+            self._busy_time += future.result()[1]
+
+    def _job_done(self, loop: asyncio.AbstractEventLoop, job: Future) -> None:
+        """Передает завершенную задачу в цикл событий (вызывается в потоке воркера)."""
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self._release, job)
+
+    async def _run(self, func: Callable, *args: Any) -> Any:
+        """
+        Выполняет функцию в пуле воркеров.
+
+        Args:
+            func(Callable): Функция для выполнения.
+            *args(Any): Аргументы функции.
+
+        Returns:
+            Any: Результат функции.
+
+        Raises:
+            HTTPException: Если очередь пула переполнена или истек таймаут.
+        """
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again later",
+                headers={"Retry-After": "1"},
+            )
+        self._in_flight += 1
+        loop = asyncio.get_running_loop()
+        job = self.executor.submit(_timed_call, func, *args)
+        # Слот освобождается после завершения задачи воркером или ее отмены до запуска
+        job.add_done_callback(functools.partial(self._job_done, loop))
+        try:
+            # По таймауту задача, еще не взятая воркером, отменяется и не тратит процессор на ответ с ошибкой
+            result, elapsed = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication timed out, try again later",
+                headers={"Retry-After": "1"},
+            )
+        metrics.observe_hashing(func.__name__.lstrip("_"), elapsed)
+        return result
+
+    async def configure(self, rounds: int | None, target: float, min_rounds: int) -> None:
+        """
+        Устанавливает стоимость хэширования: заданную или подобранную под целевое время.
+
+        Вызывается при запуске приложения до первого обращения к пулу.
+
+        Args:
+            rounds(int | None): Стоимость bcrypt, если None - подбирается под целевое время.
+            target(float): Целевое время хэширования одного пароля в секундах.
+            min_rounds(int): Минимально допустимая стоимость при подборе.
+        """
+        calibrated = rounds is None
+        if calibrated:
+            rounds = await asyncio.to_thread(calibrate_rounds, target, min_rounds)
+        _configure(rounds)
+        self.rounds = rounds
+        self.shutdown()
+        if rounds < DEFAULT_ROUNDS:
+            logger.warning(
+                "Password hashing: bcrypt rounds=%d is below the default %d, new passwords get weaker hashes",
+                rounds,
+                DEFAULT_ROUNDS,
+            )
+        self._dummy_hash = await asyncio.to_thread(_hash, secrets.token_urlsafe())
+        elapsed = await asyncio.to_thread(_measure, rounds)
+        logger.info(
+            "Password hashing: bcrypt rounds=%d, %.0f ms per hash (target %.0f ms, %s)",
+            rounds,
+            elapsed * 1000,
+            target * 1000,
+            "calibrated" if calibrated else "configured",
+        )
+
+    async def hash(self, password: str) -> str:
+        """
+        Хэширует пароль.
+
+        Args:
+            password(str): Пароль.
+
+        Returns:
+            str: Хэш пароля.
+        """
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Проверяет пароль по хэшу.
+
+        Args:
+            password(str): Пароль.
+            hashed_password(str): Хэш пароля.
+
+        Returns:
+            bool: Результат проверки.
+        """
+        return await self._run(_verify, password, hashed_password)
+
+    async def verify_dummy(self, password: str) -> bool:
+        """
+        Проверяет пароль по фиктивному хэшу с текущей стоимостью.
+
+        Вызывается при входе несуществующего пользователя, чтобы время ответа не отличалось от входа
+        с неверным паролем и не выдавало, существует ли логин.
+
+        Args:
+            password(str): Пароль.
+
+        Returns:
+            bool: Всегда False.
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_urlsafe())
+        await self._run(_verify, password, self._dummy_hash)
+        return False
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Проверяет пароль по хэшу и пересчитывает хэш, если его стоимость ниже текущей.
+
+        Args:
+            password(str): Пароль.
+            hashed_password(str): Хэш пароля.
+
+        Returns:
+            tuple[bool, str | None]: Результат проверки и новый хэш, если старый нужно заменить.
+        """
+        return await self._run(_verify_and_update, password, hashed_password)
+
+    def stats(self) -> dict:
+        """
+        Статистика использования пула.
+
+        Returns:
+            dict: Размер пула, занятые воркеры, очередь, отклоненные задачи и загрузка пула.
+        """
+        busy = min(self._in_flight, self.max_workers)
+        uptime = time.monotonic() - self._started_at
+        return {
+            "executor": self.executor_type,
+            "rounds": self.rounds,
+            "workers": self.max_workers,
+            "busy": busy,
+            "queued": self._in_flight - busy,
+            "max_queue": self.max_queue,
+            "utilization": busy / self.max_workers,
+            "avg_utilization": self._busy_time / (uptime * self.max_workers) if uptime else 0.0,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "timeouts": self._timeouts,
+            "busy_seconds": self._busy_time,
+        }
+
+    def shutdown(self) -> None:
+        """Останавливает пул воркеров."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_type=config.HASHING_EXECUTOR,
+    max_workers=config.HASHING_WORKERS,
+    max_queue=config.HASHING_MAX_QUEUE,
+    timeout=config.HASHING_TIMEOUT,
+)
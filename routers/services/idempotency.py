@@ -0,0 +1,79 @@
+"""Модуль с быстрым обнаружением повторных платежей."""
+
+from collections import OrderedDict
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+from models.transactions import Transaction
+
+
+class RecentTransactions:
+    """
+    Ограниченный LRU недавно проведенных transaction_id.
+
+    Позволяет отклонить повтор вебхука без обращения к БД. Отсутствие transaction_id в кэше
+    ничего не гарантирует: источником истины остается первичный ключ transaction_keys.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Инициализация кэша.
+
+        Args:
+            max_size(int): Максимальное количество хранимых transaction_id.
+        """
+        self.max_size = max_size
+        self._ids: OrderedDict[str, None] = OrderedDict()
+        self.hits = 0
+
+    def __contains__(self, transaction_id: str) -> bool:
+        """Проверяет, проводился ли платеж, и отмечает обращение к transaction_id."""
+        if transaction_id in self._ids:
+            self._ids.move_to_end(transaction_id)
+            self.hits += 1
+            return True
+        return False
+
+    def __len__(self) -> int:
+        """Количество хранимых transaction_id."""
+        return len(self._ids)
+
+    def add(self, transaction_id: str) -> None:
+        """
+        Запоминает проведенный платеж, вытесняя самый давний при переполнении.
+
+        Args:
+            transaction_id(str): ID транзакции.
+        """
+        self._ids[transaction_id] = None
+        self._ids.move_to_end(transaction_id)
+        if len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+
+    def add_many(self, transaction_ids: Iterable[str]) -> None:
+        """
+        Запоминает несколько проведенных платежей.
+
+        Args:
+            transaction_ids(Iterable[str]): ID транзакций.
+        """
+        for transaction_id in transaction_ids:
+            self.add(transaction_id)
+
+    async def warm(self, db: AsyncSession) -> None:
+        """
+        Заполняет кэш последними проведенными платежами.
+
+        Args:
+            db(AsyncSession): Сессия базы данных.
+        """
+        transaction_ids = await db.scalars(
+            select(Transaction.transaction_id).order_by(Transaction.id.desc()).limit(self.max_size)
+        )
+        self.add_many(reversed(transaction_ids.all()))
+
+
+recent_transactions = RecentTransactions(max_size=config.IDEMPOTENCY_CACHE_SIZE)
@@ -0,0 +1,181 @@
+"""Модуль с ключами подписи токенов доступа."""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import get_default_algorithms
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class KeyRing:
+    """
+    Набор ключей для подписи и проверки токенов.
+
+    Без JWT_KEYS_DIR токены подписываются общим SECRET_KEY алгоритмом ALGORITHM, как раньше.
+    С JWT_KEYS_DIR ключи загружаются из PEM-файлов каталога, имя файла без расширения служит
+    идентификатором ключа (kid). Токены подписываются закрытым ключом JWT_ACTIVE_KID (RS256 для RSA,
+    EdDSA для Ed25519) с kid в заголовке, открытые ключи публикуются в JWKS, поэтому другие сервисы
+    проверяют токены локально.
+
+    На время перехода с общего секрета можно включить JWT_ACCEPT_SECRET_TOKENS, чтобы уже выданные
+    токены без kid оставались действительными до истечения срока.
+
+    Ротация ключа: новый ключ добавляется в каталог и публикуется в JWKS, затем JWT_ACTIVE_KID
+    переключается на него. Старый ключ (достаточно открытого) остается в каталоге, пока не истекут
+    подписанные им токены.
+    """
+
+    def __init__(
+        self,
+        keys_dir: str | None,
+        active_kid: str | None,
+        secret: str | None,
+        algorithm: str | None,
+        accept_secret_tokens: bool = False,
+    ) -> None:
+        """
+        Инициализация набора ключей.
+
+        Args:
+            keys_dir(str | None): Каталог с PEM-файлами ключей.
+            active_kid(str | None): Идентификатор ключа для подписи, по умолчанию последний по имени закрытый ключ.
+            secret(str | None): Общий секрет для HS-алгоритмов.
+            algorithm(str | None): Алгоритм подписи общим секретом.
+            accept_secret_tokens(bool): Принимать ли токены без kid, подписанные общим секретом,
+                при асимметричной подписи (на время перехода).
+        """
+        self.secret = secret
+        self.algorithm = algorithm
+        self.accept_secret_tokens = accept_secret_tokens
+        self.signing_keys: dict[str, tuple[str, Any]] = {}
+        self.verification_keys: dict[str, tuple[str, Any]] = {}
+        self.active_kid = None
+        self._jwks = b'{"keys":[]}'
+        if keys_dir:
+            self.load(Path(keys_dir), active_kid)
+
+    @property
+    def asymmetric(self) -> bool:
+        """Подписываются ли токены закрытым ключом."""
+        return self.active_kid is not None
+
+    def load(self, keys_dir: Path, active_kid: str | None) -> None:
+        """
+        Загружает ключи из каталога.
+
+        Args:
+            keys_dir(Path): Каталог с PEM-файлами ключей.
+            active_kid(str | None): Идентификатор ключа для подписи.
+
+        Raises:
+            RuntimeError: Если ключ не поддерживается или ключ для подписи не найден.
+        """
+        signing_keys = {}
+        verification_keys = {}
+        for path in sorted(keys_dir.glob("*.pem")):
+            algorithm, private_key, public_key = _load_pem(path)
+            verification_keys[path.stem] = (algorithm, public_key)
+            if private_key is not None:
+                signing_keys[path.stem] = (algorithm, private_key)
+        active_kid = active_kid or next(reversed(signing_keys), None)
+        if active_kid not in signing_keys:
+            raise RuntimeError(f"JWT signing key {active_kid!r} has no private key in {keys_dir}")
+        algorithms = get_default_algorithms()
+        jwks = [
+            {**algorithms[algorithm].to_jwk(public_key, as_dict=True), "kid": kid, "alg": algorithm, "use": "sig"}
+            for kid, (algorithm, public_key) in verification_keys.items()
+        ]
+        self.signing_keys = signing_keys
+        self.verification_keys = verification_keys
+        self.active_kid = active_kid
+        self._jwks = json.dumps({"keys": jwks}, separators=(",", ":")).encode()
+        logger.info("Loaded %d JWT keys, signing with kid=%s", len(verification_keys), active_kid)
+
+    def sign(self, payload: dict) -> str:
+        """
+        Подписывает токен.
+
+        Args:
+            payload(dict): Данные токена.
+
+        Returns:
+            str: Токен.
+        """
+        if not self.asymmetric:
+            return jwt.encode(payload, self.secret, algorithm=self.algorithm)
+        algorithm, key = self.signing_keys[self.active_kid]
+        return jwt.encode(payload, key, algorithm=algorithm, headers={"kid": self.active_kid})
+
+    def decode(self, token: str) -> dict:
+        """
+        Проверяет подпись и срок действия токена.
+
+        Ключ выбирается по kid из заголовка, алгоритм определяется ключом, а не заголовком токена.
+
+        Args:
+            token(str): Токен.
+
+        Returns:
+            dict: Данные токена.
+
+        Raises:
+            jwt.PyJWTError: Если токен недействителен или ключ не найден.
+        """
+        if not self.asymmetric:
+            return jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None and self.accept_secret_tokens:
+            return jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        if not isinstance(kid, str) or kid not in self.verification_keys:
+            raise jwt.InvalidTokenError(f"Unknown kid {kid!r}")
+        algorithm, key = self.verification_keys[kid]
+        return jwt.decode(token, key, algorithms=[algorithm])
+
+    def jwks(self) -> bytes:
+        """Открытые ключи в формате JWKS, сериализованные заранее."""
+        return self._jwks
+
+
+def _load_pem(path: Path) -> tuple[str, Any, Any]:
+    """
+    Загружает ключ RSA или Ed25519 из PEM-файла.
+
+    Args:
+        path(Path): Путь к файлу.
+
+    Returns:
+        tuple: Алгоритм подписи, закрытый ключ (None для файла с открытым ключом) и открытый ключ.
+
+    Raises:
+        RuntimeError: Если тип ключа не поддерживается.
+    """
+    pem = path.read_bytes()
+    try:
+        key = serialization.load_pem_private_key(pem, password=None)
+        private_key, public_key = key, key.public_key()
+    except ValueError:
+        key = serialization.load_pem_public_key(pem)
+        private_key, public_key = None, key
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return "RS256", private_key, public_key
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return "EdDSA", private_key, public_key
+    raise RuntimeError(f"Unsupported JWT key {path}: expected an RSA or Ed25519 PEM key")
+
+
+keyring = KeyRing(
+    keys_dir=config.JWT_KEYS_DIR,
+    active_kid=config.JWT_ACTIVE_KID,
+    secret=config.SECRET_KEY,
+    algorithm=config.ALGORITHM,
+    accept_secret_tokens=config.JWT_ACCEPT_SECRET_TOKENS,
+)
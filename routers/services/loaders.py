@@ -0,0 +1,90 @@
+"""Модуль с загрузчиком сущностей в рамках одного запроса."""
+
+import asyncio
+from typing import Annotated, Any, TypeVar
+
+from fastapi.params import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.db_depends import get_db
+
+
+Model = TypeVar("Model")
+
+
+class EntityLoader:
+    """
+    Загрузчик сущностей по первичному ключу в рамках одного запроса.
+
+    Загруженные сущности запоминаются, повторная загрузка не обращается к БД. Ключи, запрошенные
+    одновременно (например, через asyncio.gather), загружаются одним запросом WHERE id IN (...).
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        """
+        Инициализация загрузчика.
+
+        Args:
+            db(AsyncSession): Сессия базы данных запроса.
+        """
+        self.db = db
+        self._loaded: dict[tuple[type, Any], Any] = {}
+        self._pending: dict[type, dict[Any, asyncio.Future]] = {}
+        self._lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, model: type[Model], pk: Any) -> Model | None:
+        """
+        Загружает сущность по первичному ключу.
+
+        Args:
+            model(type): Модель.
+            pk(Any): Первичный ключ.
+
+        Returns:
+            Model | None: Сущность или None, если ее нет в БД.
+        """
+        if (model, pk) in self._loaded:
+            return self._loaded[model, pk]
+        pending = self._pending.setdefault(model, {})
+        if pk not in pending:
+            pending[pk] = asyncio.get_running_loop().create_future()
+            if len(pending) == 1:
+                task = asyncio.create_task(self._dispatch(model))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        return await pending[pk]
+
+    async def load_many(self, model: type[Model], pks: list) -> list[Model | None]:
+        """
+        Загружает несколько сущностей одним запросом.
+
+        Args:
+            model(type): Модель.
+            pks(list): Первичные ключи.
+
+        Returns:
+            list[Model | None]: Сущности в порядке ключей.
+        """
+        return list(await asyncio.gather(*(self.load(model, pk) for pk in pks)))
+
+    async def _dispatch(self, model: type) -> None:
+        """Загружает накопленные ключи модели одним запросом."""
+        async with self._lock:
+            pending = self._pending.pop(model, {})
+            try:
+                entities = await self.db.scalars(select(model).where(model.id.in_(pending)))
+                found = {entity.id: entity for entity in entities}
+            except Exception as exc:
+                for future in pending.values():
+                    future.set_exception(exc)
+                return
+            for pk, future in pending.items():
+                self._loaded[model, pk] = found.get(pk)
+                future.set_result(found.get(pk))
+
+
+def get_loader(db: Annotated[AsyncSession, Depends(get_db)]) -> EntityLoader:
+    """Создает загрузчик сущностей для текущего запроса."""
+    return EntityLoader(db)
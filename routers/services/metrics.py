@@ -0,0 +1,378 @@
+"""Модуль с метриками запросов, запросов к БД и хэширования паролей в формате Prometheus.
+
+Метрики собираются в памяти воркера, при нескольких воркерах Prometheus опрашивает каждый из них
+(или суммирует значения по меткам экземпляров).
+"""
+
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    """Форматирует метки в виде {name="value",...} с экранированием значений."""
+    if not names:
+        return ""
+    pairs = (
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """Счетчик Prometheus с метками."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> None:
+        """
+        Инициализация счетчика.
+
+        Args:
+            name(str): Имя метрики.
+            documentation(str): Описание метрики.
+            labels(tuple[str, ...]): Имена меток.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple, float] = {} if labels else {(): 0}
+
+    def inc(self, *label_values: Any, amount: float = 1) -> None:
+        """Увеличивает значение счетчика с указанными значениями меток."""
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        """Строки метрики в текстовом формате Prometheus."""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for label_values, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class Histogram:
+    """Гистограмма Prometheus с метками."""
+
+    def __init__(
+        self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS
+    ) -> None:
+        """
+        Инициализация гистограммы.
+
+        Args:
+            name(str): Имя метрики.
+            documentation(str): Описание метрики.
+            labels(tuple[str, ...]): Имена меток.
+            buckets(tuple): Верхние границы интервалов по возрастанию.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # Количество наблюдений в каждом интервале (последний - +Inf) и их сумма, накопление - при выводе
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = {}
+
+    def observe(self, value: float, *label_values: Any) -> None:
+        """Добавляет наблюдение с указанными значениями меток."""
+        counts = self._counts.get(label_values)
+        if counts is None:
+            counts = self._counts[label_values] = [0] * (len(self.buckets) + 1)
+            self._sums[label_values] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[label_values] += value
+
+    def render(self) -> Iterable[str]:
+        """Строки метрики в текстовом формате Prometheus."""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        bucket_labels = self.labels + ("le",)
+        for label_values, counts in self._counts.items():
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                total += count
+                yield f"{self.name}_bucket{_format_labels(bucket_labels, label_values + (bound,))} {total}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {self._sums[label_values]}"
+            yield f"{self.name}_count{labels} {total}"
+
+
+class RequestStats:
+    """Статистика обработки текущего HTTP-запроса."""
+
+    __slots__ = ("path", "queries", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self, path: str) -> None:
+        """
+        Инициализация статистики.
+
+        Args:
+            path(str): Путь запроса.
+        """
+        self.path = path
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+# Объект изменяется на месте, поэтому учитываются запросы из гринлетов SQLAlchemy и дочерних задач
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+class QueryLog:
+    """Журнал запросов к БД, выполненных внутри блока with, для проверки количества запросов и поиска N+1."""
+
+    def __init__(self) -> None:
+        """Инициализация журнала."""
+        self.statements: list[str] = []
+        self._token = None
+
+    def __enter__(self) -> "QueryLog":
+        """Начинает запись запросов текущего контекста."""
+        self._token = query_log.set(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Заканчивает запись запросов."""
+        query_log.reset(self._token)
+
+    @property
+    def count(self) -> int:
+        """Количество выполненных запросов."""
+        return len(self.statements)
+
+    def repeated(self, threshold: int = 2) -> dict[str, int]:
+        """
+        Одинаковые запросы, выполненные с разными параметрами не менее threshold раз (признак N+1).
+
+        Args:
+            threshold(int): Минимальное количество повторов.
+
+        Returns:
+            dict[str, int]: Текст запроса и количество его выполнений.
+        """
+        counts: dict[str, int] = {}
+        for statement in self.statements:
+            counts[statement] = counts.get(statement, 0) + 1
+        return {statement: count for statement, count in counts.items() if count >= threshold}
+
+
+query_log: ContextVar[QueryLog | None] = ContextVar("query_log", default=None)
+
+
+class Metrics:
+    """Метрики приложения."""
+
+    def __init__(self, slow_query_seconds: float) -> None:
+        """
+        Инициализация метрик.
+
+        Args:
+            slow_query_seconds(float): Время выполнения запроса к БД, начиная с которого запрос
+                записывается в журнал, 0 - не записывать.
+        """
+        self.slow_query_seconds = slow_query_seconds
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status")
+        )
+        self.request_queries = Histogram(
+            "http_request_db_queries", "Database queries per HTTP request.", ("route",), QUERY_COUNT_BUCKETS
+        )
+        self.request_db_time = Histogram(
+            "http_request_db_seconds", "Time spent in database queries per HTTP request.", ("route",)
+        )
+        self.request_pool_wait = Histogram(
+            "http_request_db_pool_wait_seconds",
+            "Time spent waiting for pool connections per HTTP request.",
+            ("route",),
+        )
+        self.query_duration = Histogram("db_query_duration_seconds", "Database query latency.")
+        self.slow_queries = Counter("db_slow_queries_total", "Queries slower than the slow query threshold.")
+        self.query_errors = Counter("db_query_errors_total", "Queries that raised a database error.")
+        self.pool_wait = Histogram("db_pool_wait_seconds", "Time spent waiting for a pool connection.")
+        self.hashing_duration = Histogram(
+            "password_hashing_seconds", "Time spent in bcrypt per operation.", ("operation",)
+        )
+        self._collectors: list[Callable[[], Iterable[str]]] = []
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        """
+        Записывает время обработки HTTP-запроса и статистику обращений к БД.
+
+        Args:
+            method(str): HTTP-метод.
+            route(str): Шаблон пути эндпоинта.
+            status(int): Код ответа.
+            seconds(float): Время обработки в секундах.
+            stats(RequestStats): Статистика запроса.
+        """
+        self.request_duration.observe(seconds, method, route, status)
+        self.request_queries.observe(stats.queries, route)
+        self.request_db_time.observe(stats.db_seconds, route)
+        self.request_pool_wait.observe(stats.pool_wait_seconds, route)
+
+    def observe_query(self, seconds: float, statement: str, failed: bool = False) -> None:
+        """
+        Записывает время выполнения запроса к БД и записывает медленный запрос в журнал.
+
+        Args:
+            seconds(float): Время выполнения в секундах.
+            statement(str): Текст запроса (без параметров).
+            failed(bool): Запрос завершился ошибкой БД.
+        """
+        self.query_duration.observe(seconds)
+        if failed:
+            self.query_errors.inc()
+        stats = request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += seconds
+        log = query_log.get()
+        if log is not None:
+            log.statements.append(statement)
+        if self.slow_query_seconds and seconds >= self.slow_query_seconds:
+            self.slow_queries.inc()
+            logger.warning(
+                "Slow query %.1f ms (%s): %s", seconds * 1000, stats.path if stats else "background", statement
+            )
+
+    def observe_pool_wait(self, seconds: float) -> None:
+        """Записывает время ожидания соединения из пула."""
+        self.pool_wait.observe(seconds)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.pool_wait_seconds += seconds
+
+    def observe_hashing(self, operation: str, seconds: float) -> None:
+        """Записывает время хэширования или проверки пароля."""
+        self.hashing_duration.observe(seconds, operation)
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Добавляет функцию, возвращающую строки метрик, значения которых считываются при выводе."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Текст метрик.
+        """
+        lines = []
+        for metric in (
+            self.request_duration,
+            self.request_queries,
+            self.request_db_time,
+            self.request_pool_wait,
+            self.query_duration,
+            self.slow_queries,
+            self.query_errors,
+            self.pool_wait,
+            self.hashing_duration,
+        ):
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(slow_query_seconds=config.SLOW_QUERY_MS / 1000)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Запоминает время начала запроса к БД."""
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Записывает время выполнения запроса к БД."""
+    metrics.observe_query(time.perf_counter() - conn.info["query_start"].pop(), statement)
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    """Записывает запрос, завершившийся ошибкой: after_cursor_execute для него не вызывается."""
+    connection = context.connection
+    if connection is None or not connection.info.get("query_start"):
+        return
+    started = connection.info["query_start"].pop()
+    metrics.observe_query(time.perf_counter() - started, context.statement or "", failed=True)
+
+
+def _pool_gauges(name: str, engine: AsyncEngine) -> Callable[[], Iterable[str]]:
+    """Создает функцию вывода текущего состояния пула соединений движка."""
+
+    def collect() -> Iterable[str]:
+        stats = engine.pool.stats()
+        labels = _format_labels(("engine",), (name,))
+        for key, kind in (("checked_out", "gauge"), ("overflow", "gauge"), ("timeouts", "counter")):
+            metric = f"db_pool_{key}" + ("_total" if kind == "counter" else "")
+            yield f"# TYPE {metric} {kind}"
+            yield f"{metric}{labels} {stats[key]}"
+
+    return collect
+
+
+def instrument_engine(name: str, engine: AsyncEngine) -> None:
+    """
+    Подключает сбор метрик запросов и ожидания соединений к движку БД.
+
+    Args:
+        name(str): Имя движка в метках метрик.
+        engine(AsyncEngine): Движок БД.
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+    engine.pool.on_wait = metrics.observe_pool_wait
+    metrics.add_collector(_pool_gauges(name, engine))
+
+
+class MetricsMiddleware:
+    """ASGI middleware, записывающий время обработки запросов и статистику обращений к БД по эндпоинтам."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Инициализация middleware.
+
+        Args:
+            app(ASGIApp): Приложение.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Обрабатывает запрос, замеряя время до отправки ответа."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(scope["path"])
+        token = request_stats.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_stats.reset(token)
+            # Шаблон пути вместо фактического, чтобы количество меток не росло с количеством пользователей
+            route = getattr(scope.get("route"), "path", "unmatched")
+            metrics.observe_request(scope["method"], route, status, time.perf_counter() - start, stats)
@@ -0,0 +1,42 @@
+"""Модуль с курсорной пагинацией."""
+
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Кодирует позицию последнего элемента страницы в непрозрачный курсор.
+
+    Args:
+        last_id(int): ID последнего элемента страницы.
+
+    Returns:
+        str: Курсор следующей страницы.
+    """
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Декодирует курсор в ID последнего элемента предыдущей страницы.
+
+    Args:
+        cursor(str): Курсор.
+
+    Returns:
+        int: ID последнего элемента предыдущей страницы.
+
+    Raises:
+        HTTPException: Если курсор некорректен.
+    """
+    try:
+        last_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        last_id = None
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return last_id
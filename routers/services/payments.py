@@ -0,0 +1,90 @@
+"""Модуль с пакетным проведением платежей."""
+
+from collections import defaultdict
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import Integer, Numeric, column, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.accounts import Account
+from models.transaction_keys import TransactionKey
+from models.transactions import Transaction
+from routers.services.statements import add_daily_totals
+from schemas import WebhookRequestSchema
+
+
+APPLIED = "applied"
+DUPLICATE = "duplicate"
+REJECTED = "rejected"
+
+
+async def apply_payments(db: AsyncSession, payments: Iterable[WebhookRequestSchema]) -> dict[str, str]:
+    """
+    Проводит пачку платежей без коммита.
+
+    Ключи платежей вставляются одним INSERT ... ON CONFLICT (transaction_id) DO NOTHING в transaction_keys,
+    платежи с новыми ключами - одним INSERT в секционированную таблицу transactions, балансы счетов
+    изменяются одним UPDATE на суммы вставленных платежей, сгруппированные по счетам, дневные итоги
+    счетов - одним INSERT ... ON CONFLICT DO UPDATE.
+    Подписи, владельцы счетов и уникальность transaction_id внутри пачки должны быть проверены заранее.
+
+    Args:
+        db(AsyncSession): Сессия базы данных.
+        payments(Iterable[WebhookRequestSchema]): Проверенные платежи.
+
+    Returns:
+        dict[str, str]: Статус (applied или duplicate) для каждого transaction_id.
+    """
+    payments = list(payments)
+    if not payments:
+        return {}
+    # Счета блокируются до вставки платежей и в порядке ID: вставка берет на строку счета блокировку
+    # внешнего ключа, и ее повышение до блокировки на запись приводит к взаимным блокировкам
+    account_ids = sorted({payment.account_id for payment in payments})
+    await db.execute(
+        select(Account.id).where(Account.id.in_(account_ids)).order_by(Account.id).with_for_update(key_share=True)
+    )
+    # Уникальность transaction_id во всех секциях обеспечивает таблица ключей
+    applied = set(
+        await db.scalars(
+            insert(TransactionKey)
+            .values([{"transaction_id": payment.transaction_id} for payment in payments])
+            .on_conflict_do_nothing(index_elements=["transaction_id"])
+            .returning(TransactionKey.transaction_id)
+        )
+    )
+    deltas = defaultdict(Decimal)
+    rows = []
+    for payment in payments:
+        if payment.transaction_id in applied:
+            deltas[payment.account_id] += payment.amount
+            rows.append(
+                {
+                    "transaction_id": payment.transaction_id,
+                    "account_id": payment.account_id,
+                    "user_id": payment.user_id,
+                    "amount": payment.amount,
+                }
+            )
+    if rows:
+        inserted = await db.execute(
+            insert(Transaction)
+            .values(rows)
+            .returning(Transaction.account_id, Transaction.created_at, Transaction.amount)
+        )
+        await add_daily_totals(db, inserted.all())
+    if deltas:
+        account_deltas = values(column("account_id", Integer), column("delta", Numeric(18, 2)), name="deltas").data(
+            sorted(deltas.items())
+        )
+        await db.execute(
+            update(Account)
+            .where(Account.id == account_deltas.c.account_id)
+            .values(total=Account.total + account_deltas.c.delta)
+            .execution_options(synchronize_session=False)
+        )
+    return {
+        payment.transaction_id: APPLIED if payment.transaction_id in applied else DUPLICATE for payment in payments
+    }
@@ -0,0 +1,81 @@
+"""Модуль с выдачей и ротацией токенов обновления."""
+
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Row, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+from models.refresh_tokens import RefreshToken
+
+
+def hash_refresh_token(token: str) -> str:
+    """SHA-256 токена обновления, в БД хранится только он."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def issue_refresh_token(db: AsyncSession, user_id: int, token_version: int, family_id: str | None = None) -> str:
+    """
+    Выдает токен обновления, коммит выполняет вызывающий код.
+
+    Args:
+        db(AsyncSession): Сессия базы данных.
+        user_id(int): Идентификатор пользователя.
+        token_version(int): Версия токенов пользователя, при отзыве токенов токен обновления тоже недействителен.
+        family_id(str | None): Цепочка токенов, по умолчанию новая.
+
+    Returns:
+        str: Токен обновления.
+    """
+    token = secrets.token_urlsafe(32)
+    await db.execute(
+        insert(RefreshToken).values(
+            user_id=user_id,
+            family_id=family_id or uuid.uuid4().hex,
+            token_hash=hash_refresh_token(token),
+            token_version=token_version,
+            expires_at=datetime.now(timezone.utc) + timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return token
+
+
+async def use_refresh_token(db: AsyncSession, token: str) -> Row | None:
+    """
+    Помечает токен обновления использованным.
+
+    Поиск выполняется по уникальному индексу token_hash одним UPDATE, поэтому при одновременных запросах
+    с одним токеном использовать его удастся только одному. Если токен уже был использован, цепочка
+    токенов удаляется целиком: токен мог быть украден. Коммит выполняет вызывающий код.
+
+    Args:
+        db(AsyncSession): Сессия базы данных.
+        token(str): Токен обновления.
+
+    Returns:
+        Row | None: user_id, family_id, token_version и expires_at токена
+        или None, если токен неизвестен, использован или истек.
+    """
+    now = datetime.now(timezone.utc)
+    token_hash = hash_refresh_token(token)
+    row = (
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == token_hash, RefreshToken.used_at.is_(None))
+            .values(used_at=now)
+            .returning(
+                RefreshToken.user_id, RefreshToken.family_id, RefreshToken.token_version, RefreshToken.expires_at
+            )
+        )
+    ).one_or_none()
+    if row is None:
+        family_id = select(RefreshToken.family_id).where(RefreshToken.token_hash == token_hash).scalar_subquery()
+        await db.execute(delete(RefreshToken).where(RefreshToken.family_id == family_id))
+        return None
+    # SQLite возвращает время без часового пояса, в БД оно хранится в UTC
+    if row.expires_at.replace(tzinfo=timezone.utc) <= now:
+        return None
+    return row
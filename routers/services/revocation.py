@@ -0,0 +1,159 @@
+"""Модуль с отзывом токенов доступа пользователей."""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+from database.db import Session
+from models.token_revocations import TokenRevocation
+from models.users import User
+
+
+logger = logging.getLogger(__name__)
+
+# Запас при инкрементальном чтении: запись с более ранним revoked_at может быть закоммичена позже
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int) -> int:
+    """
+    Отзывает все выданные токены пользователя.
+
+    Увеличивает версию токенов пользователя и записывает отзыв в token_revocations в текущей транзакции,
+    коммит выполняет вызывающий код. После коммита версию нужно передать в revoked_tokens.apply.
+
+    Args:
+        db(AsyncSession): Сессия базы данных.
+        user_id(int): Идентификатор пользователя.
+
+    Returns:
+        int: Новая версия токенов пользователя.
+    """
+    token_version = await db.scalar(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+        .returning(User.token_version)
+    )
+    await db.execute(insert(TokenRevocation).values(user_id=user_id, token_version=token_version))
+    return token_version
+
+
+class RevokedTokens:
+    """
+    Минимальные действительные версии токенов пользователей в памяти воркера.
+
+    Проверка токена выполняется поиском в словаре, без обращения к БД. Отзывы, сделанные другими воркерами,
+    подгружаются из token_revocations фоновой задачей раз в TOKEN_REVOCATION_POLL_SECONDS. Отзывы старше
+    срока действия токена не хранятся: все токены, выданные до них, уже истекли.
+    """
+
+    def __init__(self, token_lifetime: timedelta, poll_interval: float) -> None:
+        """
+        Инициализация списка отзывов.
+
+        Args:
+            token_lifetime(timedelta): Срок действия токена доступа.
+            poll_interval(float): Интервал чтения новых отзывов из БД в секундах.
+        """
+        self.token_lifetime = token_lifetime
+        self.poll_interval = poll_interval
+        self._versions: dict[int, tuple[int, datetime]] = {}
+        self._watermark: datetime | None = None
+        self._task: asyncio.Task | None = None
+        self.rejected = 0
+
+    def is_revoked(self, user_id: int, token_version: int) -> bool:
+        """
+        Проверяет, отозван ли токен.
+
+        Args:
+            user_id(int): Идентификатор пользователя.
+            token_version(int): Версия токена.
+
+        Returns:
+            bool: True, если токен отозван.
+        """
+        entry = self._versions.get(user_id)
+        if entry is not None and token_version < entry[0]:
+            self.rejected += 1
+            return True
+        return False
+
+    def apply(self, user_id: int, token_version: int, revoked_at: datetime | None = None) -> None:
+        """
+        Запоминает отзыв токенов пользователя.
+
+        Args:
+            user_id(int): Идентификатор пользователя.
+            token_version(int): Минимальная действительная версия токенов.
+            revoked_at(datetime | None): Время отзыва, по умолчанию текущее.
+        """
+        revoked_at = revoked_at or datetime.now(timezone.utc)
+        entry = self._versions.get(user_id)
+        if entry is None or token_version > entry[0]:
+            self._versions[user_id] = (token_version, revoked_at)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """
+        Подгружает отзывы, появившиеся с прошлого чтения.
+
+        Args:
+            db(AsyncSession): Сессия базы данных.
+        """
+        cutoff = datetime.now(timezone.utc) - self.token_lifetime
+        since = cutoff if self._watermark is None else max(cutoff, self._watermark - REFRESH_OVERLAP)
+        rows = await db.execute(
+            select(TokenRevocation.user_id, TokenRevocation.token_version, TokenRevocation.revoked_at).where(
+                TokenRevocation.revoked_at > since
+            )
+        )
+        for user_id, token_version, revoked_at in rows:
+            self.apply(user_id, token_version, revoked_at)
+            if self._watermark is None or revoked_at > self._watermark:
+                self._watermark = revoked_at
+        for user_id in [key for key, (_, revoked_at) in self._versions.items() if revoked_at <= cutoff]:
+            del self._versions[user_id]
+
+    def start(self) -> None:
+        """Запускает фоновое чтение новых отзывов."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновое чтение новых отзывов."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Периодически читает новые отзывы, ошибки чтения не останавливают задачу."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                async with Session() as session:
+                    await self.refresh(session)
+            except Exception:
+                logger.exception("Failed to refresh revoked tokens")
+
+    def stats(self) -> dict:
+        """
+        Статистика списка отзывов.
+
+        Returns:
+            dict: Количество пользователей с отозванными токенами и отклоненных запросов.
+        """
+        return {"users": len(self._versions), "rejected": self.rejected}
+
+
+revoked_tokens = RevokedTokens(
+    token_lifetime=timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES),
+    poll_interval=config.TOKEN_REVOCATION_POLL_SECONDS,
+)
@@ -0,0 +1,54 @@
+"""Модуль с дневными итогами платежей для выписок по счетам."""
+
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.account_daily_totals import AccountDailyTotal
+
+
+def payment_day(created_at: datetime) -> date:
+    """День платежа по UTC (SQLite возвращает время UTC без часового пояса)."""
+    if created_at.tzinfo is None:
+        return created_at.date()
+    return created_at.astimezone(timezone.utc).date()
+
+
+async def add_daily_totals(db: AsyncSession, payments: Iterable[tuple[int, datetime, Decimal]]) -> None:
+    """
+    Добавляет проведенные платежи к дневным итогам счетов без коммита.
+
+    Итоги всех дней изменяются одним INSERT ... ON CONFLICT DO UPDATE. Строки счетов должны быть
+    заблокированы вызывающим кодом, поэтому одновременные платежи на счет обновляют итоги по очереди.
+
+    Args:
+        db(AsyncSession): Сессия базы данных.
+        payments(Iterable[tuple[int, datetime, Decimal]]): ID счета, время и сумма каждого платежа.
+    """
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    for account_id, created_at, amount in payments:
+        total = totals[account_id, payment_day(created_at)]
+        total[0] += 1
+        total[1] += amount
+    if not totals:
+        return
+    insert = sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+    statement = insert(AccountDailyTotal).values(
+        [
+            {"account_id": account_id, "day": day, "credits": credits, "total": total}
+            for (account_id, day), (credits, total) in sorted(totals.items())
+        ]
+    )
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["account_id", "day"],
+            set_={
+                "credits": AccountDailyTotal.credits + statement.excluded.credits,
+                "total": AccountDailyTotal.total + statement.excluded.total,
+            },
+        )
+    )
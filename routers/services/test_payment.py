@@ -1,10 +1,9 @@
 """Скрипт-эмуляция создания транзакции с уникальным идентификатором и вычисление подписи из другого сервиса."""
 
-import hashlib
 import json
 import uuid
 
-from config import SECRET_KEY
+from routers.services.validators import sign_webhook
 
 
 transaction_id = uuid.uuid4()  # Эмуляция создания транзакции с уникальным идентификатором
@@ -13,10 +12,9 @@ data = {
     "transaction_id": str(transaction_id),
     "account_id": 1,  # Указываем идентификатор счета
     "user_id": 2,  # Указываем идентификатор пользователя
-    "amount": 20000.0,  # Указываем сумму пополнения (Должно быть вещественным числом, pydantic приводит к типу float)
+    "amount": 20000.0,  # Указываем сумму пополнения (в подписи всегда с двумя знаками после запятой)
 }
 
-payload = f"{data["account_id"]}{data["amount"]}{data["transaction_id"]}{data["user_id"]}{SECRET_KEY}"
-expected_signature = hashlib.sha256(payload.encode()).hexdigest()
-data["signature"] = expected_signature
+# Подпись HMAC-SHA256 канонического представления платежа ключом WEBHOOK_SECRET
+data["signature"] = sign_webhook(data["transaction_id"], data["user_id"], data["account_id"], data["amount"])
 print(json.dumps(data, indent=2))  # Копируем полученные данные в запрос для эмуляции получения с другого сервиса
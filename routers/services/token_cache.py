@@ -0,0 +1,87 @@
+"""Модуль с кэшем проверенных токенов доступа."""
+
+import hashlib
+import time
+from collections import OrderedDict
+
+import config
+
+
+class TokenCache:
+    """
+    Ограниченный LRU проверенных токенов.
+
+    Ключом служит SHA-256 токена, поэтому сами токены в памяти не хранятся. Данные токена хранятся
+    до истечения его срока действия (exp), после чего токен снова проверяется полностью
+    и отклоняется как просроченный. Недействительные токены в кэш не попадают.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Инициализация кэша.
+
+        Args:
+            max_size(int): Максимальное количество хранимых токенов.
+        """
+        self.max_size = max_size
+        self._claims: OrderedDict[bytes, tuple[int, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        """Ключ кэша для токена."""
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        """
+        Получение данных проверенного токена.
+
+        Args:
+            token(str): Токен.
+
+        Returns:
+            dict | None: Данные токена или None, если токена нет в кэше или срок его действия истек.
+        """
+        key = self._key(token)
+        item = self._claims.get(key)
+        if item is not None:
+            expire, claims = item
+            if expire > time.time():
+                self._claims.move_to_end(key)
+                self.hits += 1
+                return claims
+            del self._claims[key]
+        self.misses += 1
+        return None
+
+    def add(self, token: str, claims: dict, expire: int) -> None:
+        """
+        Запоминает проверенный токен, вытесняя самый давний при переполнении.
+
+        Args:
+            token(str): Токен.
+            claims(dict): Данные токена.
+            expire(int): Время истечения срока действия токена (unix timestamp).
+        """
+        key = self._key(token)
+        self._claims[key] = (expire, claims)
+        self._claims.move_to_end(key)
+        if len(self._claims) > self.max_size:
+            self._claims.popitem(last=False)
+
+    def clear(self) -> None:
+        """Очищает кэш."""
+        self._claims.clear()
+
+    def stats(self) -> dict:
+        """
+        Статистика кэша.
+
+        Returns:
+            dict: Размер кэша, количество попаданий и промахов.
+        """
+        return {"size": len(self._claims), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache(max_size=config.TOKEN_CACHE_SIZE)
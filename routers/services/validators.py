@@ -1,11 +1,128 @@
 """Модуль с валидаторами."""
 
 import hashlib
+import hmac
+from decimal import Decimal
+from typing import Iterable
 
-from config import SECRET_KEY
+import config
 from schemas import WebhookRequestSchema
 
 
+SIGNATURE_VERSION = "v1"
+
+
+def canonical_payload(transaction_id: str, user_id: int, account_id: int, amount: Decimal | float) -> bytes:
+    """
+    Каноническое представление платежа для подписи версии v1.
+
+    Поля разделяются переводом строки, сумма всегда записывается с двумя знаками после запятой,
+    поэтому 5, 5.0 и 5.00 дают одинаковую подпись.
+
+    Args:
+        transaction_id(str): ID транзакции.
+        user_id(int): ID пользователя.
+        account_id(int): ID счета пользователя.
+        amount(Decimal | float): Сумма транзакции.
+
+    Returns:
+        bytes: Данные для подписи.
+    """
+    return f"{SIGNATURE_VERSION}\n{transaction_id}\n{user_id}\n{account_id}\n{amount:.2f}".encode()
+
+
+class HmacSigner:
+    """
+    Подпись и проверка платежей HMAC-SHA256.
+
+    Состояние HMAC с ключом вычисляется один раз при создании, для каждого сообщения копируется.
+    Для ротации ключа принимаются подписи текущим и предыдущим ключом, подписывается всегда текущим.
+    """
+
+    def __init__(self, key: str, previous_key: str | None = None) -> None:
+        """
+        Инициализация подписи.
+
+        Args:
+            key(str): Текущий ключ.
+            previous_key(str | None): Предыдущий ключ, подписи которым еще принимаются.
+
+        Raises:
+            RuntimeError: Если ключ не задан.
+        """
+        if not key:
+            raise RuntimeError("WEBHOOK_SECRET or SECRET_KEY must be set to verify webhook signatures")
+        keys = [key] + ([previous_key] if previous_key else [])
+        self._states = [hmac.new(k.encode(), digestmod=hashlib.sha256) for k in keys]
+
+    def sign(self, message: bytes) -> str:
+        """
+        Подписывает сообщение текущим ключом.
+
+        Args:
+            message(bytes): Сообщение.
+
+        Returns:
+            str: Подпись вида "v1=<hex>".
+        """
+        state = self._states[0].copy()
+        state.update(message)
+        return f"{SIGNATURE_VERSION}={state.hexdigest()}"
+
+    def verify(self, message: bytes, signature: str) -> bool:
+        """
+        Проверяет подпись сообщения за постоянное время.
+
+        Args:
+            message(bytes): Сообщение.
+            signature(str): Подпись вида "v1=<hex>".
+
+        Returns:
+            bool: Результат проверки подписи.
+        """
+        # compare_digest принимает только ASCII-строки, поэтому сравниваются байты
+        signature = signature.encode()
+        valid = False
+        for base in self._states:
+            state = base.copy()
+            state.update(message)
+            valid |= hmac.compare_digest(f"{SIGNATURE_VERSION}={state.hexdigest()}".encode(), signature)
+        return valid
+
+
+webhook_signer = HmacSigner(config.WEBHOOK_SECRET, config.WEBHOOK_SECRET_PREVIOUS)
+
+
+def sign_webhook(transaction_id: str, user_id: int, account_id: int, amount: Decimal | float) -> str:
+    """
+    Подписывает платеж текущим ключом (для отправителей вебхуков и тестов).
+
+    Args:
+        transaction_id(str): ID транзакции.
+        user_id(int): ID пользователя.
+        account_id(int): ID счета пользователя.
+        amount(Decimal | float): Сумма транзакции.
+
+    Returns:
+        str: Подпись вида "v1=<hex>".
+    """
+    return webhook_signer.sign(canonical_payload(transaction_id, user_id, account_id, amount))
+
+
+def _verify_legacy(data: WebhookRequestSchema) -> bool:
+    """Проверяет подпись старого формата: SHA-256 от полей платежа (сумма - как float) и SECRET_KEY."""
+    payload = f"{data.account_id}{float(data.amount)}{data.transaction_id}{data.user_id}{config.SECRET_KEY}"
+    return hmac.compare_digest(hashlib.sha256(payload.encode()).hexdigest().encode(), data.signature.encode())
+
+
+def _verify(data: WebhookRequestSchema) -> bool:
+    """Проверяет подпись вебхука текущего или, если разрешено, старого формата."""
+    if data.signature.startswith(f"{SIGNATURE_VERSION}="):
+        message = canonical_payload(data.transaction_id, data.user_id, data.account_id, data.amount)
+        return webhook_signer.verify(message, data.signature)
+    return config.WEBHOOK_LEGACY_SIGNATURES and _verify_legacy(data)
+
+
 async def verify_signature(data: WebhookRequestSchema) -> bool:
     """
     Проверяет подпись вебхука.
@@ -16,6 +133,17 @@ async def verify_signature(data: WebhookRequestSchema) -> bool:
     Returns:
         bool: Результат проверки подписи.
     """
-    payload = f"{data.account_id}{data.amount}{data.transaction_id}{data.user_id}{SECRET_KEY}"
-    expected_signature = hashlib.sha256(payload.encode()).hexdigest()
-    return expected_signature == data.signature
+    return _verify(data)
+
+
+async def verify_signatures(items: Iterable[WebhookRequestSchema]) -> list[bool]:
+    """
+    Проверяет подписи пачки вебхуков.
+
+    Args:
+        items(Iterable[WebhookRequestSchema]): Данные вебхуков.
+
+    Returns:
+        list[bool]: Результаты проверки подписей в порядке вебхуков.
+    """
+    return [_verify(data) for data in items]
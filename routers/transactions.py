@@ -1,37 +1,71 @@
 """Модуль для работы с транзакциями."""
 
-from typing import Annotated
+from typing import Annotated, List
 
-import sqlalchemy
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Body, HTTPException
 from fastapi.params import Depends
-from sqlalchemy import insert, select
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from database.db_depends import get_db
+import config
+from database.db_depends import get_db, mark_user_write
 from models.accounts import Account
+from models.transaction_keys import TransactionKey
 from models.transactions import Transaction
-from models.users import User
 from routers.auth import get_current_user
-from routers.services.validators import verify_signature
-from schemas import WebhookRequestSchema
+from routers.services.cache import accounts_key, cache
+from routers.services.group_commit import payment_committer
+from routers.services.idempotency import recent_transactions
+from routers.services.loaders import EntityLoader, get_loader
+from routers.services.payments import APPLIED, DUPLICATE, REJECTED, apply_payments
+from routers.services.statements import add_daily_totals
+from routers.services.validators import verify_signature, verify_signatures
+from schemas import BatchPaymentResultSchema, WebhookRequestSchema
 
 
 router = APIRouter(prefix="/transaction", tags=["transactions"])
 
 
+async def check_account(loader: EntityLoader, account_id: int, user_id: int) -> None:
+    """
+    Проверяет, что счет существует и принадлежит пользователю.
+
+    Args:
+        loader(EntityLoader): Загрузчик сущностей запроса.
+        account_id(int): ID счета.
+        user_id(int): ID текущего пользователя.
+
+    Raises:
+        HTTPException: Если счет не найден или принадлежит другому пользователю.
+    """
+    account = await loader.load(Account, account_id)
+    if not account:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account not found")
+    if account.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="The account specified is not the current user"
+        )
+
+
 @router.post("/payment")
 async def payment(
     db: Annotated[AsyncSession, Depends(get_db)],
+    loader: Annotated[EntityLoader, Depends(get_loader)],
     payment_data: WebhookRequestSchema,
     get_user: Annotated[dict, Depends(get_current_user)],
 ) -> dict:
     """
     Запрос на создание платежа.
 
+    Повтор недавно проведенного платежа отклоняется без записи в БД после проверки пользователя и счета.
+    При включенном групповом коммите платеж проводится вместе с другими платежами пачки, ответ возвращается
+    после коммита пачки.
+
     Args:
         db(AsyncSession): Сессия базы данных.
+        loader(EntityLoader): Загрузчик сущностей запроса.
         payment_data(WebhookRequestSchema): Данные платежа.
         get_user(dict): Текущий пользователь.
 
@@ -42,29 +76,116 @@ async def payment(
     """
     if not await verify_signature(payment_data):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid signature")
-    user = await db.scalar(select(User).where(User.id == payment_data.user_id))
-    if not user:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User not found")
-    if get_user["id"] != user.id:
+    # Пользователь из токена существует, поэтому достаточно сравнить идентификаторы без запроса к БД
+    if get_user["id"] != payment_data.user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="invalid user specified")
-    account = await db.scalar(select(Account).where(Account.id == payment_data.account_id))
-    if not account:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account not found")
-    if account.user_id != get_user["id"]:
+    recent = payment_data.transaction_id in recent_transactions
+    if recent or payment_committer.running:
+        await check_account(loader, payment_data.account_id, get_user["id"])
+    # Повтор отклоняется без записи в БД, но только после проверки пользователя и счета
+    if recent:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Transaction already exists")
+    if payment_committer.running:
+        # Соединение возвращается в пул до ожидания коммита пачки
+        await db.close()
+        payment_status = await payment_committer.submit(payment_data)
+        recent_transactions.add(payment_data.transaction_id)
+        mark_user_write(payment_data.user_id)
+        if payment_status == DUPLICATE:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Transaction already exists")
+        await cache.invalidate(accounts_key(payment_data.user_id))
+        return {"status_code": status.HTTP_200_OK, "transaction": "payment successful"}
+    # Зачисление выполняется одним UPDATE, строка счета заблокирована до коммита вместе со вставкой платежа
+    total = await db.scalar(
+        update(Account)
+        .where(Account.id == payment_data.account_id, Account.user_id == get_user["id"])
+        .values(total=Account.total + payment_data.amount)
+        .returning(Account.total)
+    )
+    if total is None:
+        await check_account(loader, payment_data.account_id, get_user["id"])
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="The account specified is not the current user"
         )
-    account.total += payment_data.amount
-    try:
-        await db.execute(
-            insert(Transaction).values(
-                transaction_id=payment_data.transaction_id,
-                account_id=payment_data.account_id,
-                user_id=payment_data.user_id,
-                amount=payment_data.amount,
-            )
-        )
-    except sqlalchemy.exc.IntegrityError:
+    # Ключ платежа уникален во всех секциях transactions, повтор ключ не вставляет. Остальные ошибки
+    # (например, нет секции для даты платежа) не считаются повтором и возвращаются как ошибка сервера
+    insert_key = sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+    key = await db.scalar(
+        insert_key(TransactionKey)
+        .values(transaction_id=payment_data.transaction_id)
+        .on_conflict_do_nothing(index_elements=["transaction_id"])
+        .returning(TransactionKey.transaction_id)
+    )
+    if key is None:
+        recent_transactions.add(payment_data.transaction_id)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Transaction already exists")
+    created_at = await db.scalar(
+        insert(Transaction)
+        .values(
+            transaction_id=payment_data.transaction_id,
+            account_id=payment_data.account_id,
+            user_id=payment_data.user_id,
+            amount=payment_data.amount,
+        )
+        .returning(Transaction.created_at)
+    )
+    await add_daily_totals(db, [(payment_data.account_id, created_at, payment_data.amount)])
     await db.commit()
+    recent_transactions.add(payment_data.transaction_id)
+    mark_user_write(payment_data.user_id)
+    await cache.invalidate(accounts_key(payment_data.user_id))
     return {"status_code": status.HTTP_200_OK, "transaction": "payment successful"}
+
+
+@router.post("/payments/batch", response_model=List[BatchPaymentResultSchema])
+async def payments_batch(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    payments_data: Annotated[List[WebhookRequestSchema], Body(min_length=1, max_length=config.PAYMENT_BATCH_MAX_SIZE)],
+    get_user: Annotated[dict, Depends(get_current_user)],
+) -> List[dict]:
+    """
+    Запрос на создание пачки платежей.
+
+    Все платежи пачки проводятся в одной транзакции БД. Платежи с неверной подписью или на чужой счет
+    отклоняются, повторные платежи с уже проведенным transaction_id помечаются как дубликаты.
+
+    Args:
+        db(AsyncSession): Сессия базы данных.
+        payments_data(List[WebhookRequestSchema]): Данные платежей.
+        get_user(dict): Текущий пользователь.
+
+    Returns:
+        List[dict]: Статус проведения каждого платежа пачки.
+    """
+    account_ids = {payment_data.account_id for payment_data in payments_data}
+    user_accounts = set(
+        await db.scalars(select(Account.id).where(Account.id.in_(account_ids), Account.user_id == get_user["id"]))
+    )
+    signatures = await verify_signatures(payments_data)
+    results = []
+    accepted = {}
+    for payment_data, signature_valid in zip(payments_data, signatures):
+        detail = None
+        if not signature_valid:
+            detail = "Invalid signature"
+        elif payment_data.user_id != get_user["id"]:
+            detail = "invalid user specified"
+        elif payment_data.account_id not in user_accounts:
+            detail = "The account specified is not the current user"
+        if detail:
+            results.append({"transaction_id": payment_data.transaction_id, "status": REJECTED, "detail": detail})
+        elif payment_data.transaction_id in accepted or payment_data.transaction_id in recent_transactions:
+            results.append({"transaction_id": payment_data.transaction_id, "status": DUPLICATE, "detail": None})
+        else:
+            accepted[payment_data.transaction_id] = payment_data
+            results.append({"transaction_id": payment_data.transaction_id, "status": APPLIED, "detail": None})
+    statuses = await apply_payments(db, accepted.values())
+    await db.commit()
+    recent_transactions.add_many(statuses)
+    mark_user_write(get_user["id"])
+    if APPLIED in statuses.values():
+        await cache.invalidate(accounts_key(get_user["id"]))
+    for result in results:
+        if result["status"] == APPLIED:
+            result["status"] = statuses[result["transaction_id"]]
+    return results
@@ -1,20 +1,37 @@
 """Модуль для работы с пользователями."""
 
-from typing import Annotated, List, Sequence
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Annotated, List, Literal
 
 import sqlalchemy
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.params import Depends
-from sqlalchemy import insert, select, update
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import Date, DateTime, and_, cast, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette import status
 
-from database.db_depends import get_db
+from database.db_depends import get_db, get_read_db, get_read_session_factory, mark_user_write
+from models.account_daily_totals import AccountDailyTotal
 from models.accounts import Account
 from models.transactions import Transaction
 from models.users import User
-from routers.auth import bcrypt_context, get_current_user
-from schemas import AccountSchema, CreateUserSchema, TransactionSchema, UpdateUserSchema, UsersWithAccounts
+from routers.auth import get_current_user
+from routers.services.cache import accounts_key, cache, user_key
+from routers.services.export import MEDIA_TYPES, stream_transactions
+from routers.services.hashing import password_hasher
+from routers.services.loaders import EntityLoader, get_loader
+from routers.services.pagination import decode_cursor, encode_cursor
+from routers.services.revocation import revoke_user_tokens, revoked_tokens
+from schemas import (
+    AccountSchema,
+    CreateUserSchema,
+    StatementSchema,
+    TransactionPageSchema,
+    UpdateUserSchema,
+    UsersWithAccounts,
+)
 
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -45,6 +62,7 @@ async def create_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission",
         )
+    hashed_password = await password_hasher.hash(user.password)
     try:
         await db.execute(
             insert(User).values(
@@ -52,7 +70,7 @@ async def create_user(
                 username=user.username,
                 first_name=user.first_name,
                 last_name=user.last_name,
-                password=bcrypt_context.hash(user.password),
+                password=hashed_password,
             )
         )
     except sqlalchemy.exc.IntegrityError:
@@ -63,22 +81,32 @@ async def create_user(
     new_user = await db.scalar(select(User).where(User.email == user.email))
     await db.execute(insert(Account).values(user_id=new_user.id))
     await db.commit()
+    mark_user_write(new_user.id)
+    await cache.invalidate(user_key(new_user.id), accounts_key(new_user.id))
     return {"status_code": status.HTTP_201_CREATED, "transaction": "Successful"}
 
 
 @router.get("/users-with-accounts", response_model=List[UsersWithAccounts])
 async def get_users_with_accounts(
-    db: Annotated[AsyncSession, Depends(get_db)], get_user: Annotated[dict, Depends(get_current_user)]
-) -> List[dict]:
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    get_user: Annotated[dict, Depends(get_current_user)],
+    after_id: Annotated[int | None, Query(description="ID последнего пользователя предыдущей страницы")] = None,
+    limit: Annotated[int, Query(ge=1, le=1000, description="Количество пользователей на странице")] = 100,
+) -> ORJSONResponse:
     """
     Получение списка пользователей и списка его счетов с балансами.
 
+    Пользователи отдаются постранично в порядке убывания ID, для получения следующей страницы
+    передается ID последнего пользователя текущей страницы в параметре after_id.
+
     Args:
         db (AsyncSession): Объект сессии базы данных.
         get_user (dict): Текущий пользователь.
+        after_id (int | None): ID последнего пользователя предыдущей страницы.
+        limit (int): Количество пользователей на странице.
 
     Returns:
-        List[dict]: Список пользователей и их счетов с балансами.
+        ORJSONResponse: Список пользователей и их счетов с балансами.
 
     Raises:
         HTTPException: Если у пользователя нет прав администратора.
@@ -88,23 +116,38 @@ async def get_users_with_accounts(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission",
         )
-    users = await db.scalars(select(User).where(User.is_active).order_by(User.id.desc()))
-    users_list = []
-    for user in users:
-        accounts = await db.scalars(select(Account).where(Account.user_id == user.id))
-        user_dict = {
-            "id": user.id,
-            "email": user.email,
-            "full_name": f"{user.first_name} {user.last_name}",
-            "accounts": [{"id": account.id, "total": account.total} for account in accounts],
-        }
-        users_list.append(user_dict)
-    return users_list
+    query = select(User.id, User.email, User.first_name, User.last_name).where(User.is_active)
+    if after_id is not None:
+        query = query.where(User.id < after_id)
+    users = (await db.execute(query.order_by(User.id.desc()).limit(limit))).all()
+    accounts = {user_id: [] for user_id, *_ in users}
+    if accounts:
+        rows = await db.execute(
+            select(Account.user_id, Account.id, Account.total)
+            .where(Account.user_id.in_(accounts))
+            .order_by(Account.id)
+        )
+        # Суммы NUMERIC отдаются строками без перевода в float, как Money в схемах ответов
+        for user_id, account_id, total in rows:
+            accounts[user_id].append({"id": account_id, "total": str(total)})
+    # Ответ собирается из строк БД и отдается без повторной валидации response_model
+    return ORJSONResponse(
+        [
+            {
+                "id": user_id,
+                "email": email,
+                "full_name": f"{first_name} {last_name}",
+                "accounts": accounts[user_id],
+            }
+            for user_id, email, first_name, last_name in users
+        ]
+    )
 
 
 @router.put("/{user_id}")
 async def update_user(
     db: Annotated[AsyncSession, Depends(get_db)],
+    loader: Annotated[EntityLoader, Depends(get_loader)],
     get_user: Annotated[dict, Depends(get_current_user)],
     user_id: int,
     update_data: UpdateUserSchema,
@@ -112,8 +155,11 @@ async def update_user(
     """
     Обновление данных пользователя.
 
+    При изменении имени пользователя, активности или прав администратора выданные токены пользователя отзываются.
+
     Args:
         db (AsyncSession): Объект сессии базы данных.
+        loader (EntityLoader): Загрузчик сущностей запроса.
         get_user (dict): Текущий пользователь.
         user_id (int): Идентификатор пользователя.
         update_data (UpdateUserSchema): Объект данных пользователя.
@@ -130,30 +176,47 @@ async def update_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission",
         )
-    user = await db.scalar(select(User).where(User.id == user_id))
+    user = await loader.load(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
+    # Токены содержат имя пользователя и права, при их изменении выданные токены отзываются
+    revoke = (user.username, user.is_active, user.is_admin) != (
+        update_data.username,
+        update_data.is_active,
+        update_data.is_admin,
+    )
     try:
         await db.execute(update(User).where(User.id == user_id).values(**update_data.model_dump()))
+        if revoke:
+            token_version = await revoke_user_tokens(db, user_id)
         await db.commit()
     except sqlalchemy.exc.IntegrityError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already exists",
         )
+    if revoke:
+        revoked_tokens.apply(user_id, token_version)
+    mark_user_write(user_id)
+    await cache.invalidate(user_key(user_id))
     return {"status_code": status.HTTP_200_OK, "transaction": "User update is successful"}
 
 
 @router.get("/{user_id}")
 async def retrieve_user(
-    db: Annotated[AsyncSession, Depends(get_db)], user_id: int, get_user: Annotated[dict, Depends(get_current_user)]
+    db: Annotated[AsyncSession, Depends(get_db)],
+    user_id: int,
+    get_user: Annotated[dict, Depends(get_current_user)],
 ) -> dict:
     """
     Получение данных о пользователе.
 
+    Данные читаются через кэш и сбрасываются из него при изменении пользователя. При промахе кэша
+    данные читаются из основной БД, чтобы не сохранить в кэш данные с отстающей реплики.
+
     Args:
         db (AsyncSession): Объект сессии базы данных.
         user_id (int): Идентификатор пользователя.
@@ -167,21 +230,32 @@ async def retrieve_user(
     """
     if not get_user["is_admin"] and user_id != get_user["id"]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You can't get someone else's data")
-    user = await db.scalar(select(User).where(User.id == user_id))
-    if not user:
+
+    async def load_user() -> dict | None:
+        user = await db.scalar(select(User).where(User.id == user_id))
+        if not user:
+            return None
+        return {"id": user.id, "email": user.email, "full_name": f"{user.first_name} {user.last_name}"}
+
+    profile = await cache.get_or_load(user_key(user_id), load_user)
+    if not profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    return {"id": user.id, "email": user.email, "full_name": f"{user.first_name} {user.last_name}"}
+    return profile
 
 
 @router.delete("/{user_id}")
 async def delete_user(
-    db: Annotated[AsyncSession, Depends(get_db)], user_id: int, get_user: Annotated[dict, Depends(get_current_user)]
+    db: Annotated[AsyncSession, Depends(get_db)],
+    loader: Annotated[EntityLoader, Depends(get_loader)],
+    user_id: int,
+    get_user: Annotated[dict, Depends(get_current_user)],
 ) -> dict:
     """
-    Удаление пользователя. Перевод поля is_active в False.
+    Удаление пользователя. Перевод поля is_active в False и отзыв выданных токенов.
 
     Args:
         db (AsyncSession): Объект сессии базы данных.
+        loader (EntityLoader): Загрузчик сущностей запроса.
         user_id (int): Идентификатор пользователя.
         get_user (dict): Текущий пользователь.
 
@@ -197,8 +271,8 @@ async def delete_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission",
         )
-    user = await db.scalar(select(User).where(User.id == user_id, User.is_active))
-    if not user:
+    user = await loader.load(User, user_id)
+    if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
@@ -206,24 +280,33 @@ async def delete_user(
     if user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can't delete admin")
     user.is_active = False
+    token_version = await revoke_user_tokens(db, user_id)
     await db.commit()
+    revoked_tokens.apply(user_id, token_version)
+    mark_user_write(user_id)
+    await cache.invalidate(user_key(user_id))
     return {"status_code": status.HTTP_200_OK, "transaction": "User delete is successful"}
 
 
 @router.get("/{user_id}/accounts", response_model=List[AccountSchema])
 async def get_accounts_user(
-    db: Annotated[AsyncSession, Depends(get_db)], user_id: int, get_user: Annotated[dict, Depends(get_current_user)]
-) -> Sequence[Account]:
+    db: Annotated[AsyncSession, Depends(get_db)],
+    user_id: int,
+    get_user: Annotated[dict, Depends(get_current_user)],
+) -> List[dict]:
     """
     Получение списка счетов и баланса пользователя.
 
+    Счета читаются через кэш и сбрасываются из него при изменении баланса платежом. При промахе кэша
+    счета читаются из основной БД, чтобы не сохранить в кэш баланс с отстающей реплики.
+
     Args:
         db (AsyncSession): Объект сессии базы данных.
         user_id (int): Идентификатор пользователя.
         get_user (dict): Текущий пользователь.
 
     Returns:
-        Sequence[Account]: Список счетов и баланса пользователя.
+        List[dict]: Список счетов и баланса пользователя.
 
     Raises:
         HTTPException: Если пользователь не найден или не имеет прав администратора
@@ -231,30 +314,126 @@ async def get_accounts_user(
     """
     if not get_user["is_admin"] and user_id != get_user["id"]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You can't get someone else's accounts")
-    user = await db.scalar(select(User).where(User.id == user_id))
-    if not user:
+
+    async def load_accounts() -> List[dict] | None:
+        # Проверка существования пользователя и выборка счетов выполняются одним запросом
+        rows = await db.execute(
+            select(User.id, Account.id, Account.total)
+            .outerjoin(Account, Account.user_id == User.id)
+            .where(User.id == user_id)
+            .order_by(Account.id)
+        )
+        rows = rows.all()
+        if not rows:
+            return None
+        return [
+            {"id": account_id, "total": str(total)} for _, account_id, total in rows if account_id is not None
+        ]
+
+    accounts = await cache.get_or_load(accounts_key(user_id), load_accounts)
+    if accounts is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-    accounts = await db.scalars(select(Account).where(Account.user_id == user_id))
-    return accounts.all()
+    return accounts
 
 
-@router.get("/{user_id}/transactions", response_model=List[TransactionSchema])
+@router.get("/{user_id}/accounts/{account_id}/statement", response_model=StatementSchema)
+async def get_account_statement(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    user_id: int,
+    account_id: int,
+    get_user: Annotated[dict, Depends(get_current_user)],
+    granularity: Annotated[Literal["day", "week", "month"], Query(description="Длина периода")] = "day",
+    date_from: Annotated[date | None, Query(alias="from", description="Первый день выписки (включительно)")] = None,
+    date_to: Annotated[date | None, Query(alias="to", description="Последний день выписки (не включительно)")] = None,
+) -> ORJSONResponse:
+    """
+    Получение выписки по счету пользователя: количество и сумма зачислений по дням, неделям или месяцам.
+
+    Выписка собирается в БД из дневных итогов счета (GROUP BY date_trunc), поэтому время ответа
+    зависит от количества дней в периоде, а не от количества платежей. Дни считаются по UTC.
+
+    Args:
+        db (AsyncSession): Объект сессии базы данных.
+        user_id (int): Идентификатор пользователя.
+        account_id (int): Идентификатор счета пользователя.
+        get_user (dict): Текущий пользователь.
+        granularity (str): Длина периода.
+        date_from (date | None): Первый день выписки.
+        date_to (date | None): День, следующий за последним днем выписки.
+
+    Returns:
+        ORJSONResponse: Итоги зачислений по периодам в порядке возрастания.
+
+    Raises:
+        HTTPException: Если счет пользователя не найден или пользователь пытается
+        получить выписку по счету другого пользователя.
+    """
+    if not get_user["is_admin"] and user_id != get_user["id"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You can't get someone else's accounts")
+    # Единица date_trunc подставляется в текст запроса, чтобы выражения SELECT и GROUP BY совпадали
+    period = cast(
+        func.date_trunc(literal(granularity, literal_execute=True), cast(AccountDailyTotal.day, DateTime)), Date
+    )
+    conditions = [AccountDailyTotal.account_id == Account.id]
+    if date_from is not None:
+        conditions.append(AccountDailyTotal.day >= date_from)
+    if date_to is not None:
+        conditions.append(AccountDailyTotal.day < date_to)
+    # Проверка счета пользователя и выборка итогов выполняются одним запросом
+    rows = await db.execute(
+        select(Account.id, period, func.sum(AccountDailyTotal.credits), func.sum(AccountDailyTotal.total))
+        .outerjoin(AccountDailyTotal, and_(*conditions))
+        .where(Account.id == account_id, Account.user_id == user_id)
+        .group_by(Account.id, period)
+        .order_by(period)
+    )
+    rows = rows.all()
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found",
+        )
+    periods = [
+        {"period_start": period_start, "credits": credits, "total": str(total)}
+        for _, period_start, credits, total in rows
+        if period_start is not None
+    ]
+    return ORJSONResponse({"account_id": account_id, "granularity": granularity, "periods": periods})
+
+
+@router.get("/{user_id}/transactions", response_model=TransactionPageSchema)
 async def get_transactions_user(
-    db: Annotated[AsyncSession, Depends(get_db)], user_id: int, get_user: Annotated[dict, Depends(get_current_user)]
-) -> Sequence[Transaction]:
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    user_id: int,
+    get_user: Annotated[dict, Depends(get_current_user)],
+    cursor: Annotated[str | None, Query(description="Курсор следующей страницы")] = None,
+    limit: Annotated[int, Query(ge=1, le=1000, description="Количество транзакций на странице")] = 100,
+    account_id: Annotated[int | None, Query(description="ID счета пользователя")] = None,
+    date_from: Annotated[datetime | None, Query(alias="from", description="Начало периода (включительно)")] = None,
+    date_to: Annotated[datetime | None, Query(alias="to", description="Конец периода (не включительно)")] = None,
+) -> ORJSONResponse:
     """
     Получение платежей пользователя.
 
+    Платежи отдаются постранично в порядке убывания ID, для получения следующей страницы
+    передается курсор next_cursor из ответа. Фильтр по периоду ограничивает чтение секциями
+    transactions нужных месяцев.
+
     Args:
         db (AsyncSession): Объект сессии базы данных.
         user_id (int): Идентификатор пользователя.
         get_user (dict): Текущий пользователь.
+        cursor (str | None): Курсор следующей страницы.
+        limit (int): Количество транзакций на странице.
+        account_id (int | None): Идентификатор счета пользователя.
+        date_from (datetime | None): Начало периода.
+        date_to (datetime | None): Конец периода.
 
     Returns:
-        Sequence[Transaction]: Список транзакций пользователя.
+        ORJSONResponse: Страница транзакций пользователя и курсор следующей страницы.
 
     Raises:
         HTTPException: Если пользователь не найден или не имеет прав администратора
@@ -262,11 +441,89 @@ async def get_transactions_user(
     """
     if not get_user["is_admin"] and user_id != get_user["id"]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You can't get someone else's accounts")
-    user = await db.scalar(select(User).where(User.id == user_id))
+    # Страница читается по индексу (user_id, id) без сортировки, существование пользователя
+    # проверяется отдельным запросом, только если страница пуста
+    query = select(Transaction.id, Transaction.transaction_id, Transaction.amount, Transaction.created_at).where(
+        Transaction.user_id == user_id
+    )
+    if account_id is not None:
+        query = query.where(Transaction.account_id == account_id)
+    if cursor is not None:
+        query = query.where(Transaction.id < decode_cursor(cursor))
+    if date_from is not None:
+        query = query.where(Transaction.created_at >= date_from)
+    if date_to is not None:
+        query = query.where(Transaction.created_at < date_to)
+    rows = (await db.execute(query.order_by(Transaction.id.desc()).limit(limit))).all()
+    if not rows and not await db.scalar(select(User.id).where(User.id == user_id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    items = [
+        {"id": transaction_id, "transaction_id": external_id, "amount": str(amount), "created_at": created_at}
+        for transaction_id, external_id, amount, created_at in rows
+    ]
+    next_cursor = encode_cursor(items[-1]["id"]) if len(items) == limit else None
+    # Ответ собирается из строк БД и отдается без повторной валидации response_model
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
+
+
+@router.get("/{user_id}/transactions/export", response_class=StreamingResponse)
+async def export_transactions_user(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    session_factory: Annotated[async_sessionmaker, Depends(get_read_session_factory)],
+    user_id: int,
+    get_user: Annotated[dict, Depends(get_current_user)],
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format", description="Формат")] = "ndjson",
+    min_amount: Annotated[Decimal | None, Query(description="Минимальная сумма платежа")] = None,
+    max_amount: Annotated[Decimal | None, Query(description="Максимальная сумма платежа")] = None,
+    date_from: Annotated[datetime | None, Query(alias="from", description="Начало периода (включительно)")] = None,
+    date_to: Annotated[datetime | None, Query(alias="to", description="Конец периода (не включительно)")] = None,
+    chunk_size: Annotated[int, Query(ge=1, le=10000, description="Количество строк, читаемых за раз")] = 1000,
+) -> StreamingResponse:
+    """
+    Потоковая выгрузка платежей пользователя в формате NDJSON или CSV.
+
+    Args:
+        db (AsyncSession): Объект сессии базы данных.
+        session_factory (async_sessionmaker): Фабрика сессий для потоковой выгрузки.
+        user_id (int): Идентификатор пользователя.
+        get_user (dict): Текущий пользователь.
+        export_format (str): Формат выгрузки.
+        min_amount (Decimal | None): Минимальная сумма платежа.
+        max_amount (Decimal | None): Максимальная сумма платежа.
+        date_from (datetime | None): Начало периода.
+        date_to (datetime | None): Конец периода.
+        chunk_size (int): Количество строк, читаемых из БД за раз.
+
+    Returns:
+        StreamingResponse: Поток с платежами пользователя.
+
+    Raises:
+        HTTPException: Если пользователь не найден или пытается получить транзакции другого пользователя.
+    """
+    if not get_user["is_admin"] and user_id != get_user["id"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You can't get someone else's accounts")
+    user = await db.scalar(select(User.id).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-    transactions = await db.scalars(select(Transaction).where(Transaction.user_id == user_id))
-    return transactions.all()
+    query = select(
+        Transaction.id, Transaction.transaction_id, Transaction.account_id, Transaction.amount, Transaction.created_at
+    ).where(Transaction.user_id == user_id)
+    if min_amount is not None:
+        query = query.where(Transaction.amount >= min_amount)
+    if max_amount is not None:
+        query = query.where(Transaction.amount <= max_amount)
+    if date_from is not None:
+        query = query.where(Transaction.created_at >= date_from)
+    if date_to is not None:
+        query = query.where(Transaction.created_at < date_to)
+    return StreamingResponse(
+        stream_transactions(session_factory, query.order_by(Transaction.id), export_format, chunk_size),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="transactions_{user_id}.{export_format}"'},
+    )
@@ -1,8 +1,14 @@
 """Модуль с схемами для работы приложения."""
 
-from typing import List
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Annotated, List, Literal
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, PlainSerializer
+
+
+# Денежная сумма: в БД хранится как NUMERIC, в JSON выводится строкой ("0.30"), чтобы не терять точность
+Money = Annotated[Decimal, PlainSerializer(str, return_type=str, when_used="json")]
 
 
 class CreateUserSchema(BaseModel):
@@ -35,7 +41,7 @@ class AccountSchema(BaseModel):
     """Схема для получения счетов пользователя."""
 
     id: int = Field(..., description="ID аккаунта")
-    total: float = Field(..., description="Баланс пользователя")
+    total: Money = Field(..., description="Баланс пользователя")
 
 
 class TransactionSchema(BaseModel):
@@ -43,7 +49,31 @@ class TransactionSchema(BaseModel):
 
     id: int = Field(..., description="ID транзакции")
     transaction_id: str = Field(..., description="Уникальный идентификатор транзакции в стороннем сервисе")
-    amount: float = Field(..., description="Сумма транзакции")
+    amount: Money = Field(..., description="Сумма транзакции")
+    created_at: datetime = Field(..., description="Дата и время проведения транзакции")
+
+
+class TransactionPageSchema(BaseModel):
+    """Схема для получения страницы транзакций пользователя."""
+
+    items: List[TransactionSchema] = Field(..., description="Список транзакций")
+    next_cursor: str | None = Field(None, description="Курсор следующей страницы")
+
+
+class StatementPeriodSchema(BaseModel):
+    """Схема для получения итогов платежей счета за период выписки."""
+
+    period_start: date = Field(..., description="Первый день периода")
+    credits: int = Field(..., description="Количество зачислений")
+    total: Money = Field(..., description="Сумма зачислений")
+
+
+class StatementSchema(BaseModel):
+    """Схема для получения выписки по счету."""
+
+    account_id: int = Field(..., description="ID аккаунта")
+    granularity: Literal["day", "week", "month"] = Field(..., description="Длина периода")
+    periods: List[StatementPeriodSchema] = Field(..., description="Итоги по периодам")
 
 
 class UsersWithAccounts(BaseModel):
@@ -61,5 +91,19 @@ class WebhookRequestSchema(BaseModel):
     transaction_id: str = Field(..., min_length=36, max_length=36, description="ID транзакции")
     account_id: int = Field(..., description="ID счета пользователя")
     user_id: int = Field(..., description="ID пользователя", exclude=True)
-    amount: float = Field(..., description="Сумма транзакции")
+    amount: Money = Field(..., max_digits=18, decimal_places=2, description="Сумма транзакции")
     signature: str = Field(..., description="Подпись транзакции")
+
+
+class BatchPaymentResultSchema(BaseModel):
+    """Схема для результата проведения платежа из пачки."""
+
+    transaction_id: str = Field(..., description="ID транзакции")
+    status: Literal["applied", "duplicate", "rejected"] = Field(..., description="Статус проведения платежа")
+    detail: str | None = Field(None, description="Причина отклонения платежа")
+
+
+class RefreshTokenSchema(BaseModel):
+    """Схема для обновления токена доступа."""
+
+    refresh_token: str = Field(..., description="Токен обновления")
@@ -0,0 +1,47 @@
+"""Тесты входа пользователей."""
+
+import uuid
+
+import httpx
+import pytest
+
+from routers.services.hashing import DEFAULT_ROUNDS, calibrate_rounds, password_hasher
+
+
+async def create_inactive_user(client: httpx.AsyncClient, admin_headers: dict, password: str) -> str:
+    """Создает пользователя, удаляет (деактивирует) его и возвращает логин."""
+    username = f"inactive_{uuid.uuid4().hex[:8]}"
+    user_data = {
+        "email": f"{username}@example.com",
+        "username": username,
+        "first_name": "Inactive",
+        "last_name": "User",
+        "password": password,
+    }
+    response = await client.post("/users/", json=user_data, headers=admin_headers)
+    assert response.status_code == 201
+    response = await client.get("/users/users-with-accounts", params={"limit": 1000}, headers=admin_headers)
+    user_id = next(user["id"] for user in response.json() if user["email"] == user_data["email"])
+    response = await client.delete(f"/users/{user_id}", headers=admin_headers)
+    assert response.status_code == 200
+    return username
+
+
+@pytest.mark.parametrize("user", ["unknown", "inactive"])
+async def test_failed_login_runs_bcrypt(client: httpx.AsyncClient, admin_headers: dict, user: str) -> None:
+    """Вход неизвестного и неактивного пользователя проверяет пароль bcrypt, как вход с неверным паролем."""
+    password = "Secret123"
+    if user == "unknown":
+        username = f"unknown_{uuid.uuid4().hex[:8]}"
+    else:
+        username = await create_inactive_user(client, admin_headers, password)
+    before = password_hasher.stats()["completed"]
+    response = await client.post("/auth/token", data={"username": username, "password": password})
+    assert response.status_code == 401
+    assert password_hasher.stats()["completed"] - before == 1
+
+
+async def test_bcrypt_cost_is_not_below_default(client: httpx.AsyncClient) -> None:
+    """Подобранная стоимость bcrypt не ниже стоимости passlib по умолчанию."""
+    assert password_hasher.rounds >= DEFAULT_ROUNDS
+    assert calibrate_rounds(target=0, min_rounds=DEFAULT_ROUNDS) == DEFAULT_ROUNDS
@@ -0,0 +1,99 @@
+"""Тесты кэша чтения с хранилищем Redis."""
+
+import asyncio
+import time
+from typing import Any
+
+from routers.services.cache import Cache, RedisCache
+
+
+class FakeRedis:
+    """Клиент Redis в памяти: команды GET, SET с PX и INCR, значения хранятся в байтах, как в Redis."""
+
+    def __init__(self) -> None:
+        """Инициализация пустого хранилища."""
+        self.items: dict[str, tuple[bytes, float | None]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        """Значение по ключу, None если его нет или оно устарело."""
+        value, expires_at = self.items.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.items[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, px: int | None = None) -> None:
+        """Сохранение значения на px миллисекунд."""
+        self.items[key] = (value.encode(), None if px is None else time.monotonic() + px / 1000)
+
+    async def incr(self, key: str) -> int:
+        """Увеличение числа по ключу на 1."""
+        value = int(await self.get(key) or 0) + 1
+        self.items[key] = (str(value).encode(), None)
+        return value
+
+
+def make_loader(values: list[Any]) -> tuple[list[int], Any]:
+    """Функция загрузки, возвращающая значения по очереди, и счетчик ее вызовов."""
+    calls = [0]
+
+    async def load() -> Any:
+        calls[0] += 1
+        return values[calls[0] - 1]
+
+    return calls, load
+
+
+async def test_redis_cache_hit_and_invalidate() -> None:
+    """Значение сохраняется в Redis в JSON, после сброса загружается заново."""
+    cache = Cache(RedisCache(FakeRedis()), ttl=60)
+    calls, load = make_loader([[{"id": 1, "total": "10.00"}], [{"id": 1, "total": "20.00"}]])
+
+    assert await cache.get_or_load("accounts:1", load) == [{"id": 1, "total": "10.00"}]
+    assert await cache.get_or_load("accounts:1", load) == [{"id": 1, "total": "10.00"}]
+    assert calls[0] == 1
+
+    await cache.invalidate("accounts:1")
+    assert await cache.get_or_load("accounts:1", load) == [{"id": 1, "total": "20.00"}]
+    assert calls[0] == 2
+    stats = cache.stats()
+    assert (stats["backend"], stats["hits"], stats["misses"], stats["errors"]) == ("RedisCache", 1, 2, 0)
+
+
+async def test_redis_cache_ignores_value_loaded_before_invalidate() -> None:
+    """Значение, загруженное до изменения данных и сохраненное после сброса, не читается."""
+    client = FakeRedis()
+    cache = Cache(RedisCache(client), ttl=60)
+    loading, written = asyncio.Event(), asyncio.Event()
+
+    async def load_before_write() -> dict:
+        loading.set()
+        await written.wait()
+        return {"total": "10.00"}
+
+    reader = asyncio.create_task(cache.get_or_load("accounts:1", load_before_write))
+    await loading.wait()
+    # Другой воркер изменяет баланс и сбрасывает кэш, пока первый еще читает прежний баланс
+    await Cache(RedisCache(client), ttl=60).invalidate("accounts:1")
+    written.set()
+    assert await reader == {"total": "10.00"}
+
+    calls, load = make_loader([{"total": "20.00"}])
+    assert await cache.get_or_load("accounts:1", load) == {"total": "20.00"}
+    assert calls[0] == 1
+
+
+async def test_redis_cache_errors_fall_back_to_load() -> None:
+    """Ошибки Redis не прерывают запрос: значение загружается из БД."""
+
+    class BrokenRedis(FakeRedis):
+        async def get(self, key: str) -> bytes | None:
+            """Ошибка соединения с Redis."""
+            raise ConnectionError("redis is down")
+
+    cache = Cache(RedisCache(BrokenRedis()), ttl=60)
+    calls, load = make_loader([{"id": 1}, {"id": 1}])
+    assert await cache.get_or_load("user:1", load) == {"id": 1}
+    assert await cache.get_or_load("user:1", load) == {"id": 1}
+    assert calls[0] == 2
+    assert cache.stats()["errors"] == 2
@@ -0,0 +1,31 @@
+"""Тесты метрик запросов к БД."""
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from database.db import engine
+from routers.services.metrics import metrics
+
+
+def query_errors() -> float:
+    """Значение счетчика db_query_errors_total из текста метрик."""
+    for line in metrics.render().splitlines():
+        if line.startswith("db_query_errors_total "):
+            return float(line.split()[1])
+    return 0.0
+
+
+async def test_failed_query_is_recorded(client: httpx.AsyncClient, query_log: type) -> None:
+    """Запрос с ошибкой БД учитывается в журнале и метриках и не оставляет время начала на соединении."""
+    errors_before = query_errors()
+    async with engine.connect() as connection:
+        with query_log() as log:
+            for _ in range(3):
+                with pytest.raises(ProgrammingError):
+                    await connection.execute(text("SELECT * FROM missing_table"))
+                await connection.rollback()
+        assert not connection.sync_connection.info.get("query_start")
+    assert log.count == 3
+    assert query_errors() - errors_before == 3
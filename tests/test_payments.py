@@ -0,0 +1,215 @@
+"""Тесты проведения платежей."""
+
+import asyncio
+import hashlib
+import json
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Callable
+
+import httpx
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+
+import config
+from database.db import Session, engine
+from database.partitions import month_start, partition_name
+from models.accounts import Account
+from models.users import User
+from routers.services.idempotency import recent_transactions
+from routers.services.validators import _verify_legacy, sign_webhook
+from schemas import WebhookRequestSchema
+
+
+PARALLEL_PAYMENTS = 30
+
+
+async def account_total(account_id: int) -> Decimal:
+    """Баланс счета в БД."""
+    async with Session() as session:
+        return await session.scalar(select(Account.total).where(Account.id == account_id))
+
+
+async def test_parallel_payments_to_one_account(
+    client: httpx.AsyncClient,
+    user_headers: dict,
+    user_account: tuple[int, int],
+    make_payment: Callable[[int, int, Decimal], dict],
+) -> None:
+    """Параллельные платежи на один счет зачисляются все и без потерянных обновлений."""
+    user_id, account_id = user_account
+    before = await account_total(account_id)
+    responses = await asyncio.gather(
+        *(
+            client.post(
+                "/transaction/payment",
+                json=make_payment(user_id, account_id, Decimal("0.10")),
+                headers=user_headers,
+            )
+            for _ in range(PARALLEL_PAYMENTS)
+        )
+    )
+    assert [response.status_code for response in responses] == [200] * PARALLEL_PAYMENTS
+    assert await account_total(account_id) - before == Decimal("0.10") * PARALLEL_PAYMENTS
+
+
+async def test_duplicate_payment_is_rejected(
+    client: httpx.AsyncClient,
+    user_headers: dict,
+    user_account: tuple[int, int],
+    make_payment: Callable[[int, int, Decimal], dict],
+) -> None:
+    """Повтор платежа с тем же transaction_id не изменяет баланс."""
+    user_id, account_id = user_account
+    payment = make_payment(user_id, account_id, Decimal("1.00"))
+    response = await client.post("/transaction/payment", json=payment, headers=user_headers)
+    assert response.status_code == 200
+    before = await account_total(account_id)
+    response = await client.post("/transaction/payment", json=payment, headers=user_headers)
+    assert response.status_code == 400
+    assert await account_total(account_id) == before
+
+
+@pytest.mark.parametrize("legacy_enabled, status_code", [(False, 403), (True, 200)])
+async def test_legacy_signature(
+    client: httpx.AsyncClient,
+    user_headers: dict,
+    user_account: tuple[int, int],
+    make_payment: Callable[[int, int, Decimal], dict],
+    monkeypatch: pytest.MonkeyPatch,
+    legacy_enabled: bool,
+    status_code: int,
+) -> None:
+    """Подпись старого формата принимается, только пока включен WEBHOOK_LEGACY_SIGNATURES."""
+    monkeypatch.setattr(config, "WEBHOOK_LEGACY_SIGNATURES", legacy_enabled)
+    user_id, account_id = user_account
+    payment = make_payment(user_id, account_id, Decimal("1.00"))
+    payment["signature"] = hashlib.sha256(
+        f"{account_id}{1.0}{payment['transaction_id']}{user_id}{config.SECRET_KEY}".encode()
+    ).hexdigest()
+    assert _verify_legacy(WebhookRequestSchema(**payment))
+    response = await client.post("/transaction/payment", json=payment, headers=user_headers)
+    assert response.status_code == status_code
+
+
+async def test_payment_without_partition_is_not_duplicate(
+    client: httpx.AsyncClient,
+    user_headers: dict,
+    admin_headers: dict,
+    user_account: tuple[int, int],
+    make_payment: Callable[[int, int, Decimal], dict],
+) -> None:
+    """Платеж за месяц без секции завершается ошибкой сервера, не зачисляется и может быть повторен."""
+    user_id, account_id = user_account
+    payment = make_payment(user_id, account_id, Decimal("1.00"))
+    before = await account_total(account_id)
+    month = partition_name(month_start(datetime.now(timezone.utc).date()))
+    # Секция текущего месяца - исходная таблица платежей, присоединенная миграцией
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        bounds = await connection.scalar(
+            text("SELECT pg_get_expr(relpartbound, oid) FROM pg_class WHERE relname = 'transactions_legacy'")
+        )
+        await connection.execute(text("ALTER TABLE transactions DETACH PARTITION transactions_legacy"))
+        try:
+            response = await client.get("/internal/partitions", headers=admin_headers)
+            assert month in response.json()["missing"]
+            with pytest.raises(IntegrityError):
+                await client.post("/transaction/payment", json=payment, headers=user_headers)
+        finally:
+            await connection.execute(text(f"ALTER TABLE transactions ATTACH PARTITION transactions_legacy {bounds}"))
+    assert payment["transaction_id"] not in recent_transactions
+    assert await account_total(account_id) == before
+    response = await client.get("/internal/partitions", headers=admin_headers)
+    assert response.json()["missing"] == []
+    response = await client.post("/transaction/payment", json=payment, headers=user_headers)
+    assert response.status_code == 200
+
+
+async def test_amounts_are_exact(
+    client: httpx.AsyncClient,
+    admin_headers: dict,
+    make_payment: Callable[[int, int, Decimal], dict],
+) -> None:
+    """Суммы 0.1 + 0.2 отдаются всеми эндпоинтами чтения точно, без перевода в float."""
+    username = f"money_{uuid.uuid4().hex[:8]}"
+    user_data = {
+        "email": f"{username}@example.com",
+        "username": username,
+        "first_name": "Money",
+        "last_name": "User",
+        "password": "Money123",
+    }
+    response = await client.post("/users/", json=user_data, headers=admin_headers)
+    assert response.status_code == 201
+    response = await client.post("/auth/token", data={"username": username, "password": "Money123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    async with Session() as session:
+        user_id = await session.scalar(select(User.id).where(User.username == username))
+        account_id = await session.scalar(select(Account.id).where(Account.user_id == user_id))
+    for amount in ("0.1", "0.2"):
+        response = await client.post(
+            "/transaction/payment", json=make_payment(user_id, account_id, Decimal(amount)), headers=headers
+        )
+        assert response.status_code == 200
+
+    response = await client.get(f"/users/{user_id}/accounts", headers=headers)
+    assert response.json() == [{"id": account_id, "total": "0.30"}]
+    response = await client.get(f"/users/{user_id}/transactions", headers=headers)
+    assert [item["amount"] for item in response.json()["items"]] == ["0.20", "0.10"]
+    response = await client.get(f"/users/{user_id}/accounts/{account_id}/statement", headers=headers)
+    assert [period["total"] for period in response.json()["periods"]] == ["0.30"]
+    response = await client.get(f"/users/{user_id}/transactions/export", headers=headers)
+    assert [json.loads(line)["amount"] for line in response.text.splitlines()] == ["0.10", "0.20"]
+    response = await client.get("/users/users-with-accounts", params={"limit": 1000}, headers=admin_headers)
+    assert [user["accounts"] for user in response.json() if user["id"] == user_id] == [
+        [{"id": account_id, "total": "0.30"}]
+    ]
+
+
+async def test_duplicate_payment_is_rejected_by_database(
+    client: httpx.AsyncClient,
+    user_headers: dict,
+    user_account: tuple[int, int],
+    make_payment: Callable[[int, int, Decimal], dict],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Повтор платежа, отсутствующего в кэше недавних платежей, отклоняется уникальным ключом transaction_keys."""
+    user_id, account_id = user_account
+    payment = make_payment(user_id, account_id, Decimal("1.00"))
+    response = await client.post("/transaction/payment", json=payment, headers=user_headers)
+    assert response.status_code == 200
+    monkeypatch.setattr(recent_transactions, "_ids", OrderedDict())
+    before = await account_total(account_id)
+    response = await client.post("/transaction/payment", json=payment, headers=user_headers)
+    assert response.status_code == 400
+    assert await account_total(account_id) == before
+    assert payment["transaction_id"] in recent_transactions
+
+
+async def test_recent_duplicate_is_validated_first(
+    client: httpx.AsyncClient,
+    user_headers: dict,
+    admin_headers: dict,
+    user_account: tuple[int, int],
+    make_payment: Callable[[int, int, Decimal], dict],
+) -> None:
+    """Повтор недавнего платежа на чужой счет или от другого пользователя отклоняется проверкой, а не как повтор."""
+    user_id, account_id = user_account
+    payment = make_payment(user_id, account_id, Decimal("1.00"))
+    response = await client.post("/transaction/payment", json=payment, headers=user_headers)
+    assert response.status_code == 200
+
+    response = await client.post("/transaction/payment", json=payment, headers=admin_headers)
+    assert response.status_code == 403
+    async with Session() as session:
+        other_account_id = await session.scalar(select(Account.id).where(Account.user_id != user_id).limit(1))
+    other_account = make_payment(user_id, other_account_id, Decimal("1.00"))
+    other_account["transaction_id"] = payment["transaction_id"]
+    other_account["signature"] = sign_webhook(payment["transaction_id"], user_id, other_account_id, Decimal("1.00"))
+    response = await client.post("/transaction/payment", json=other_account, headers=user_headers)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The account specified is not the current user"
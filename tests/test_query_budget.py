@@ -0,0 +1,31 @@
+"""Тесты бюджета запросов к БД на каждый эндпоинт (benchmarks/query_budget.py)."""
+
+import httpx
+import pytest
+
+from benchmarks.load import seed
+from benchmarks.query_budget import BUDGETS, REQUESTS, BudgetContext, prepare, uncovered_routes
+
+
+@pytest.fixture(scope="session")
+async def budget_context(client: httpx.AsyncClient) -> BudgetContext:
+    """Тестовые пользователи с платежами и вход от их имени."""
+    await seed(users=5, transactions=5)
+    return await prepare(client, batch=10)
+
+
+@pytest.mark.parametrize(("method", "route"), BUDGETS, ids=[f"{method} {route}" for method, route in BUDGETS])
+async def test_query_budget(budget_context: BudgetContext, query_log: type, method: str, route: str) -> None:
+    """Эндпоинт укладывается в бюджет запросов и не повторяет одинаковые запросы."""
+    path, kwargs = await REQUESTS[(method, route)](budget_context)
+    with query_log() as log:
+        response = await budget_context.client.request(method, path, **kwargs)
+    assert response.status_code < 400, response.text
+    assert log.count <= BUDGETS[(method, route)]
+    assert not log.repeated()
+
+
+def test_every_route_has_budget() -> None:
+    """Для каждого эндпоинта задан бюджет запросов."""
+    assert uncovered_routes(set(BUDGETS)) == []
+    assert REQUESTS.keys() == BUDGETS.keys()
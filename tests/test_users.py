@@ -0,0 +1,89 @@
+"""Тесты эндпоинтов пользователей."""
+
+import uuid
+from decimal import Decimal
+from typing import Callable
+
+import httpx
+from sqlalchemy import insert, select
+
+from database.db import Session
+from models.accounts import Account
+from models.users import User
+
+
+EXTRA_USERS = 25
+
+
+async def add_users_with_accounts(count: int) -> None:
+    """Создает пользователей с двумя счетами каждый."""
+    async with Session() as session:
+        usernames = [f"test_{uuid.uuid4().hex[:12]}" for _ in range(count)]
+        await session.execute(
+            insert(User),
+            [
+                {
+                    "email": f"{username}@example.com",
+                    "username": username,
+                    "first_name": "Test",
+                    "last_name": "User",
+                    "password": "-",
+                    "is_active": True,
+                    "is_admin": False,
+                }
+                for username in usernames
+            ],
+        )
+        user_ids = (await session.scalars(select(User.id).where(User.username.in_(usernames)))).all()
+        await session.execute(insert(Account), [{"user_id": user_id, "total": 0} for user_id in user_ids * 2])
+        await session.commit()
+
+
+async def test_users_with_accounts_query_count_does_not_grow(
+    client: httpx.AsyncClient, admin_headers: dict, query_log: type
+) -> None:
+    """Количество запросов списка пользователей со счетами не зависит от количества пользователей (нет N+1)."""
+    params = {"limit": 1000}
+    # Первый запрос прогревает кэши авторизации
+    await client.get("/users/users-with-accounts", params=params, headers=admin_headers)
+    with query_log() as before:
+        response = await client.get("/users/users-with-accounts", params=params, headers=admin_headers)
+    users_before = len(response.json())
+
+    await add_users_with_accounts(EXTRA_USERS)
+    with query_log() as after:
+        response = await client.get("/users/users-with-accounts", params=params, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == users_before + EXTRA_USERS
+    assert 0 < after.count == before.count
+    assert not after.repeated()
+
+
+async def test_transactions_page(
+    client: httpx.AsyncClient,
+    user_headers: dict,
+    admin_headers: dict,
+    user_account: tuple[int, int],
+    make_payment: Callable[[int, int, Decimal], dict],
+    query_log: type,
+) -> None:
+    """Страница платежей читается одним запросом, пустая страница проверяет существование пользователя."""
+    user_id, account_id = user_account
+    payment = make_payment(user_id, account_id, Decimal("1.00"))
+    response = await client.post("/transaction/payment", json=payment, headers=user_headers)
+    assert response.status_code == 200
+    with query_log() as log:
+        response = await client.get(f"/users/{user_id}/transactions", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["items"]
+    assert log.count == 1
+
+    response = await client.get(
+        f"/users/{user_id}/transactions", params={"from": "2100-01-01T00:00:00Z"}, headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
+
+    response = await client.get("/users/999999/transactions", headers=admin_headers)
+    assert response.status_code == 404